@@ -1,5 +1,5 @@
 from .piecewise_function import PiecewiseFunc
 from .piecewise_generic import PiecewiseGeneric
-from .utils import RealField
+from .utils import RealField, vectorized
 
 from portion import *
\ No newline at end of file
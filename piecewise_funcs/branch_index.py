@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+from math import ceil, inf, isclose
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from portion.interval import Interval
+
+import portion as interval
+
+# atomic interval in portion's data layout, i.e.
+# (left closed, lower bound, upper bound, right closed)
+Piece = Tuple[bool, float, float, bool]
+
+# sort key of a piece, closed lower bounds sort before open ones
+Key = Tuple[float, bool]
+
+GRID_MIN_BREAKPOINTS = 8
+GRID_MAX_BUCKETS_PER_PIECE = 4
+GRID_REL_TOL = 1e-6
+
+class BranchIndex:
+    """
+        Branch selection index of a piecewise function.
+
+        The branch intervals are split into their atomic pieces. Singleton
+        pieces, i.e. exact points like x == c, are kept in a dict, checked
+        first in O(1). The other pieces, the ranges, are kept sorted on
+        their lower bound, so that the branch a value belongs to can be
+        found by bisection in O(log k).
+
+        When the range breakpoints are (nearly) uniformly spaced, or a grid
+        step is hinted, a direct-address bucket table is also built, mapping
+        floor((x - x0)/h) to the last range starting at or before that
+        bucket, and the lookup turns into a bisection of the few ranges of
+        its bucket, in constant time for uniform breakpoints. A hint that
+        would take more than GRID_MAX_BUCKETS_PER_PIECE buckets per range,
+        e.g. for sparse bands, builds no table and lookups bisect instead.
+
+        The pieces are labelled with branch ids, the positions of their
+        branches at construction, which stay stable through later inserts and
+        removals, so that no edit relabels the other pieces. The pieces of an
+        'otherwise' branch are labelled -1.
+
+        Methods:
+            - lookup: int or None,
+                The id of the branch the given float belongs to, or None if
+                it lies outside of every branch.
+
+            - lookup_left, lookup_right: int or None,
+                The id of the branch active immediately to the left,
+                respectively the right, of the given float, or None if that
+                side lies outside of every branch.
+
+            - has_overlaps: bool,
+                Sweeps the sorted ranges, and looks every point up in them,
+                reporting whether any two pieces intersect each other.
+
+            - conflicts: bool,
+                Whether the given piece intersects a piece of any branch but
+                the 'otherwise' one. O(log k) plus the number of pieces it
+                intersects.
+
+            - insert: None,
+                Indexes the given piece under the given branch id, the piece
+                must not conflict, carving it out of the 'otherwise' pieces
+                it intersects.
+
+            - release: None,
+                Unindexes the given piece of a removed branch, or hands it
+                over to the 'otherwise' branch.
+
+                Edits drop the bucket table, if any, lookups fall back to
+                bisection until as many of them as there are ranges went
+                through, and the table is rebuilt, amortizing its cost.
+
+            - entries: tuple of lists of pieces and branch ids,
+                Every indexed piece and its branch, points and ranges merged
+                in sorted order.
+
+            - pieces_of: list of atomic intervals,
+                The pieces of the given branch, in sorted order.
+    """
+
+    __slots__ = ("__keys", "__pieces", "__branches", "__points",
+                 "__point_keys", "__point_clash", "__grid", "__grid_step",
+                 "__stale_lookups")
+
+    def __init__(self,
+                 branch_intervals: Sequence[Interval],
+                 grid_step: Optional[float] = None,
+                 otherwise: bool = False,
+    ):
+        last = len(branch_intervals) - 1 if otherwise else None
+        ranges = []
+
+        self.__points: Dict[float, int] = {}
+        self.__point_clash = False
+
+        for branch, ival in enumerate(branch_intervals):
+            label = -1 if branch == last else branch
+
+            for piece in interval.to_data(ival):
+                left, lower, upper, right = piece
+
+                if lower == upper:
+                    self.__point_clash |= lower in self.__points
+                    self.__points[lower] = label
+                else:
+                    ranges.append(((lower, not left), piece, label))
+
+        ranges.sort()
+
+        self.__keys: List[Key] = [key for key, _, _ in ranges]
+        self.__pieces: List[Piece] = [piece for _, piece, _ in ranges]
+        self.__branches: List[int] = [branch for _, _, branch in ranges]
+        self.__point_keys = sorted(self.__points)
+        self.__grid_step = grid_step
+        self.__stale_lookups = -1  # no bucket table to rebuild
+        self.__grid = self.__build_grid()
+
+    def lookup(self, x: float) -> Optional[int]:
+        points = self.__points
+
+        if points:
+            branch = points.get(x)
+
+            if branch is not None:
+                return branch
+
+        return self.__range_lookup(x)
+
+    def lookup_left(self, x: float) -> Optional[int]:
+        # last range with lower < x, points have no one sided neighbourhood
+        pos = bisect_left(self.__keys, (x, False)) - 1
+
+        if pos >= 0 and self.__pieces[pos][2] >= x:
+            return self.__branches[pos]
+        return None
+
+    def lookup_right(self, x: float) -> Optional[int]:
+        # last range with lower <= x, whatever its closedness
+        pos = bisect_right(self.__keys, (x, True)) - 1
+
+        if pos >= 0 and self.__pieces[pos][2] > x:
+            return self.__branches[pos]
+        return None
+
+    def has_overlaps(self) -> bool:
+        reach = (-inf, False)
+
+        for left, lower, upper, right in self.__pieces:
+            if lower < reach[0] or (lower == reach[0] and left and reach[1]):
+                return True
+            reach = max(reach, (upper, right))
+
+        # points against ranges, by bisection rather than pairwise
+        return self.__point_clash or \
+            any(self.__range_lookup(x) is not None for x in self.__points)
+
+    def conflicts(self, piece: Piece) -> bool:
+        _, lower, upper, _ = piece
+
+        if lower == upper:
+            branch = self.lookup(lower)
+            return branch is not None and branch >= 0
+
+        start, stop = self.__overlapping(piece)
+
+        return any(branch >= 0 for branch in self.__branches[start:stop]) or \
+            any(self.__points[x] >= 0 for x in self.__points_within(piece))
+
+    def insert(self, piece: Piece, branch: int):
+        _, lower, upper, _ = piece
+        start, stop = self.__overlapping(piece)
+
+        rests = [rest for other in self.__pieces[start:stop]
+                 for rest in interval.to_data(interval.from_data([other]) - \
+                                              interval.from_data([piece]))]
+
+        ranges = [(rest, -1) for rest in rests if rest[1] < rest[2]]
+
+        if lower < upper:
+            ranges.append((piece, branch))
+
+        # the points the piece covers can only be 'otherwise' ones
+        for x in self.__points_within(piece):
+            self.__discard_point(x)
+
+        self.__splice(start, stop, ranges)
+
+        for _, rest_lower, rest_upper, _ in rests:
+            if rest_lower == rest_upper:
+                self.__add_point(rest_lower, -1)
+
+        if lower == upper:
+            self.__add_point(lower, branch)
+
+    def release(self, piece: Piece, otherwise: bool):
+        left, lower, upper, _ = piece
+
+        if lower == upper:
+            self.__discard_point(lower)
+        else:
+            pos = bisect_left(self.__keys, (lower, not left))
+
+            assert self.__pieces[pos] == piece, f"Piece {piece} is not indexed."
+
+            self.__splice(pos, pos + 1, [])
+
+        if otherwise:
+            self.insert(piece, -1)
+
+    def entries(self) -> Tuple[List[Piece], List[int]]:
+        merged = sorted(chain(
+            zip(self.__keys, self.__pieces, self.__branches),
+            (((x, False), (True, x, x, True), b)
+             for x, b in self.__points.items()),
+        ))
+
+        return [piece for _, piece, _ in merged], [b for _, _, b in merged]
+
+    def pieces_of(self, branch: int) -> List[Piece]:
+        pieces, branches = self.entries()
+
+        return [piece for piece, b in zip(pieces, branches) if b == branch]
+
+    def __range_lookup(self, x: float) -> Optional[int]:
+        # as with portion's membership, an infinite bound contains the
+        # infinity, so -inf sorts along with the open -inf lower bounds
+        key, grid = (x, x == -inf), self.__grid
+
+        if grid is None:
+            pos = bisect_right(self.__keys, key) - 1
+
+            if self.__stale_lookups >= 0:
+                self.__count_stale_lookup()
+        else:
+            pos = self.__grid_search(x, key, *grid)
+
+        # pos is the last range with lower <= x, that is closed when equal
+        if pos < 0:
+            return None
+
+        _, _, upper, right = self.__pieces[pos]
+
+        if x < upper or (x == upper and (right or upper == inf)):
+            return self.__branches[pos]
+        return None
+
+    def __overlapping(self, piece: Piece) -> Tuple[int, int]:
+        # the run [start, stop) of ranges intersecting the piece, or the
+        # position it would be inserted at if the run is empty
+        left, lower, _, _ = piece
+        pieces = self.__pieces
+
+        # the last range starting at or before the piece is the only one
+        # preceding it, that may intersect it
+        start = bisect_right(self.__keys, (lower, not left)) - 1
+
+        if start < 0 or not self.__intersect(pieces[start], piece):
+            start += 1
+
+        stop = start
+
+        while stop < len(pieces) and self.__intersect(pieces[stop], piece):
+            stop += 1
+
+        return start, stop
+
+    def __points_within(self, piece: Piece) -> List[float]:
+        left, lower, upper, right = piece
+        keys = self.__point_keys
+
+        start = (bisect_left if left else bisect_right)(keys, lower)
+        stop = (bisect_right if right else bisect_left)(keys, upper)
+
+        return keys[start:stop]
+
+    def __add_point(self, x: float, branch: int):
+        if x not in self.__points:
+            insort(self.__point_keys, x)
+        self.__points[x] = branch
+
+    def __discard_point(self, x: float):
+        del self.__points[x]
+        del self.__point_keys[bisect_left(self.__point_keys, x)]
+
+    def __splice(self, start: int, stop: int, entries: List[Tuple[Piece, int]]):
+        # the entries must fit in place of the run [start, stop) of ranges
+        entries = sorted(entries, key=lambda e: (e[0][1], not e[0][0]))
+
+        self.__keys[start:stop] = [(lower, not left)
+                                   for (left, lower, _, _), _ in entries]
+        self.__pieces[start:stop] = [piece for piece, _ in entries]
+        self.__branches[start:stop] = [branch for _, branch in entries]
+        self.__grid = None
+        self.__stale_lookups = 0
+
+    @staticmethod
+    def __intersect(p: Piece, q: Piece) -> bool:
+        p_left, p_lower, p_upper, p_right = p
+        q_left, q_lower, q_upper, q_right = q
+
+        return (p_lower < q_upper or
+                (p_lower == q_upper and p_left and q_right)) and \
+               (q_lower < p_upper or
+                (q_lower == p_upper and q_left and p_right))
+
+    def __grid_search(self,
+                      x: float,
+                      key: Key,
+                      x0: float,
+                      step: float,
+                      table: List[int],
+    ) -> int:
+        keys = self.__keys
+
+        if not x >= x0:  # below the grid, or nan
+            return bisect_right(keys, key) - 1
+
+        bucket = int(min((x - x0) / step, len(table) - 1))
+
+        # bisect the ranges of the bucket, widened by a bucket on each side
+        # to undo any rounding of the bucket position
+        lo = max(table[max(bucket - 1, 0)], 0)
+        hi = table[bucket + 2] + 1 if bucket + 2 < len(table) else len(keys)
+        pos = bisect_right(keys, key, lo, hi) - 1
+
+        if (pos < lo and lo > 0) or (pos == hi - 1 and hi < len(keys) and
+                                     keys[hi] <= key):
+            return bisect_right(keys, key) - 1
+        return pos
+
+    def __count_stale_lookup(self):
+        self.__stale_lookups += 1
+
+        if self.__stale_lookups < len(self.__keys):
+            return
+
+        self.__stale_lookups = -1
+        self.__grid = self.__build_grid()
+
+    def __build_grid(self) -> Optional[Tuple[float, float, List[int]]]:
+        grid_step = self.__grid_step
+
+        if grid_step is not None and grid_step <= 0:
+            raise ValueError("Grid step must be positive.")
+
+        # points are looked up in their dict, only ranges make up the grid
+        bounds = sorted({bound for _, lower, upper, _ in self.__pieces
+                         for bound in (lower, upper)
+                         if -inf < bound < inf})
+
+        if len(bounds) < 2:
+            return None
+
+        span = bounds[-1] - bounds[0]
+
+        if grid_step is None:
+            if len(bounds) < GRID_MIN_BREAKPOINTS:
+                return None
+
+            grid_step = span / (len(bounds) - 1)
+
+            if not all(isclose(hi - lo, grid_step, rel_tol=GRID_REL_TOL)
+                       for lo, hi in zip(bounds, bounds[1:])):
+                return None
+
+        n_buckets = ceil(span / grid_step) + 1
+
+        # the hint is only a hint, a step too fine for the breakpoints, e.g.
+        # of sparse bands, falls back to bisection
+        if n_buckets > GRID_MAX_BUCKETS_PER_PIECE * len(self.__pieces) + 1:
+            return None
+
+        return (
+            bounds[0],
+            grid_step,
+            [bisect_right(self.__keys, (bounds[0] + j * grid_step, False)) - 1
+             for j in range(n_buckets)],
+        )
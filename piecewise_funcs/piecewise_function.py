@@ -1,16 +1,35 @@
 from __future__ import annotations
 
+from heapq import heapify, heappop, heappush
 from inspect import getsource
-from itertools import combinations, compress, starmap
-from math import inf
-from operator import and_
+from math import inf, nan
+from sys import byteorder
 from textwrap import dedent
-from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+    cast,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Sized,
+    Tuple,
+)
+from weakref import WeakValueDictionary
 
 from portion.interval import Interval
 
+from .branch_index import BranchIndex, Piece
 from .piecewise_generic import PiecewiseGeneric
+from .range_index import RangeExtremaIndex
+from .result_cache import CacheInfo, ResultCache
+from .structure import analyze_structure, BranchStructure
 from .utils import (
+    AffineFunc,
     boolop_to_interval,
     MALFORMED_PFUNC_EXCEPTION,
     node_to_func,
@@ -18,6 +37,16 @@ from .utils import (
 )
 
 import ast
+import portion as interval
+
+DOUBLE_FORMATS = {"d", "@d", "=d", "<d" if byteorder == "little" else ">d"}
+BYTE_FORMATS = {"B", "b", "c"}
+
+# relative offset of the nodes sampled inside excluded domain ends
+APPROX_OPEN_END_OFFSET = 1e-6
+
+# default number of equal segments the approximated domain is split in first
+APPROX_MIN_BRANCHES = 8
 
 class PiecewiseFunc(PiecewiseGeneric):
     """
@@ -30,11 +59,25 @@ class PiecewiseFunc(PiecewiseGeneric):
         a factory method accepting a regular python function representing a
         piecewise function in a more pythonic way.
 
+        Branch selection goes through a BranchIndex, which bisects the sorted
+        branch pieces, or addresses them directly in constant time when the
+        breakpoints lie on a uniform grid. The grid is detected
+        automatically, or it can be hinted through grid_step.
+
+        With a positive cache_size, evaluation results are kept in a thread
+        safe LRU cache keyed on the float input, which bypasses itself while
+        its hit rate is too low to pay off. It can be resized or disabled
+        later on through the cache_size attribute, and it is cleared on
+        every branch edit.
+
         Attrs:
             - intervals: list of interval objects, that define the
                 branched domain of their corresponding callback.
             - funcs: sequence of callables being evaluated as callbacks
                 upon activation of their corresponding branch.
+            - cache_size: int, the size of the result cache, 0 if disabled.
+            - cache_info: CacheInfo or None, the hits, misses, sizes and
+                bypass state of the result cache, if enabled.
 
         Methods:
             - min: tuple of int and float, the position at which the minimum
@@ -44,6 +87,11 @@ class PiecewiseFunc(PiecewiseGeneric):
                 It expects an object of type RealField, that is a single
                 number or an Iterable of floats. Union[float, Iterable[float]]
 
+                For a monotone function on a connected domain and a sorted
+                input, i.e. a range or a sequence passed with
+                assume_sorted=True, the minimum is read off the input's ends,
+                with its first occurrence found by bisection in O(log n).
+
             - max: tuple of int and float, the position at which the maximum
                 value occurs in teh sequence (i.e. argmax) and its actual
                 float value.
@@ -51,6 +99,22 @@ class PiecewiseFunc(PiecewiseGeneric):
                 It expects an object of type RealField, that is a single
                 number or an Iterable of floats. Union[float, Iterable[float]]
 
+                Shortcuts sorted input of monotone functions, as min does.
+
+            - is_continuous, is_monotone, is_convex: bool,
+                Structural properties derived lazily from the branch
+                coefficients and cached until the next branch edit.
+
+                Throws a ValueError if a branch is not affine.
+
+            - monotonicity: int or None,
+                1 for a non decreasing function, -1 for a non increasing one,
+                0 for a constant one and None otherwise.
+
+            - lipschitz_bound: float,
+                The smallest Lipschitz constant of the function on its
+                domain, infinite if the function jumps.
+
             - __apply: iterable of floats or Nones,
                 Evaluates teh piecewise function on the given input. If a
                 value does not lie on any of branches intervals, then a None
@@ -114,12 +178,185 @@ class PiecewiseFunc(PiecewiseGeneric):
 
                 i = lambda x: x
 
-            - __check_domain_validity: list of intervals,
-                Checks if one or more branches intersect each other
+            - branch_table: tuple of (interval data, coefficients) pairs,
+                The compact form of the function, one pair per branch, that
+                holds the branch interval in portion's data layout and the
+                (slope, intercept) of the branch, followed by the source of
+                its expression if it was parsed by from_funcdef, or its
+                callable when the branch is not affine.
+
+                Pickling serializes this table only and rebuilds the index
+                on unpickle, so that the pickled size stays proportional to
+                the number of branches and no AST is dragged along.
+
+            - __eq__, __hash__: structural,
+                Two functions are equal when they select the same callbacks on
+                the same domain, whatever their branch order or how their
+                intervals are split. Affine branches are compared on their
+                coefficients and the expression they evaluate, if parsed,
+                the other callbacks by identity. The canonical
+                form is built in O(k) and cached until the next branch edit,
+                which also changes the hash, so functions must not be edited
+                while held in a set, a dict or the intern pool.
+
+            - intern: PiecewiseFunc,
+                The canonical instance of the functions equal to the given
+                one, registering it if there is none yet, so that duplicates
+                can be dropped and share a single instance, along with its
+                caches. The pool holds weak references only and it is thread
+                safe.
+
+            - evaluate_into: int,
+                Evaluates the piecewise function on the given input, writing
+                doubles in place into a preallocated writable buffer, e.g. an
+                array('d'), a memoryview or a bytearray, and returns the
+                number of values that lie in the domain. Out of domain values
+                are written as fill, and flagged with a 0 in the optional
+                mask byte buffer, where in-domain values get a 1.
+
+                This avoids boxing the results and growing lists, and it
+                works without NumPy.
+
+                Throws a TypeError if a buffer is read-only or of another
+                format, or a ValueError if it is shorter than the input.
+
+            - evaluate_batch: list of floats or Nones,
+                Evaluates the piecewise function on the given input, as
+                __apply does, but partitions the input by branch first. A
+                callback marked with the vectorized decorator is then called
+                once with the whole list of values of its branch, the other
+                callbacks once per value, and the results are scattered back
+                in input order. The result cache is not used.
+
+                Everywhere else, e.g. on __call__, min, max or evaluate_into,
+                a vectorized callback is called once per value, on a list of
+                that single value.
+
+                Throws a ValueError if a vectorized callback does not return
+                as many results as it was given values.
+
+            - range_min, range_max: float or None,
+                The infimum, respectively the supremum, of the function over
+                the window [a, b], or None if the window misses the domain.
+
+                The first query builds a segment tree over the extrema of
+                every branch piece in O(k), every query then takes O(log k)
+                and is exact.
+
+                Throws a ValueError if a branch is not affine.
+
+            - range_extrema: iterable of tuples of floats or Nones,
+                The infimum and supremum over each one of many (a, b)
+                windows, sharing a single segment tree.
+
+            - insert_branch: int,
+                Adds a branch, carving its interval out of the 'otherwise'
+                branch if there is one, and returns its position. It is
+                checked against the neighbouring branch pieces only and the
+                index is updated in place, in O(log k) bisections plus a
+                list splice.
+
+                Throws a ValueError if the interval intersects another
+                branch.
+
+            - remove_branch: tuple of interval and callable,
+                Removes the branch at the given position and returns it. Its
+                interval falls back to the 'otherwise' branch, if any. The
+                positions of the following branches shift down by one.
+
+                Throws a ValueError on the 'otherwise' branch, or on the last
+                remaining branch.
+
+            - replace_branch: None,
+                Replaces the callback of the branch at the given position.
+
+            - to_interp_table: tuple of two lists of floats,
+                The vertices (xp, fp) of a continuous piecewise linear
+                function, for use with numpy.interp. It matches the function
+                exactly on its domain, outside of which numpy.interp clamps
+                to the end values, where this class returns None.
+
+                Throws a ValueError if a branch is not affine, if the
+                function is not continuous on a connected domain, or if it
+                has an unbounded branch with a non zero slope, as none of
+                these can be represented exactly.
+
+            - to_numpy_piecewise: tuple of condlist and funclist,
+                The arguments of numpy.piecewise(x, condlist, funclist) for
+                the given input, in the general case. The conditions are
+                computed by the branch index, one boolean list per branch,
+                or a single boolean for a scalar input. Constant branches are
+                exported as their constant, the other callbacks as they are,
+                so they must accept arrays, which the ones built by
+                from_funcdef do. Values outside of every branch evaluate to
+                nan.
+
+            - derivative: PiecewiseFunc,
+                The derivative of every branch over the same branch intervals.
+                At breakpoints it takes the slope of the branch the
+                breakpoint belongs to, see subgradient for one sided slopes.
+
+                Throws a ValueError if a branch is not affine.
+
+            - subgradient: iterable of tuples of floats or Nones,
+                The left and right one sided derivatives at the given input,
+                i.e. the slopes of the branches active immediately to its
+                left and right, or None on a side outside of the domain.
+
+                It expects an object of type RealField, that is a single
+                number or an Iterable of floats. Union[float, Iterable[float]]
+
+                Throws a ValueError if a branch is not affine.
+
+            - approximate: tuple of PiecewiseFunc and float,
+                Samples an expensive callable adaptively on a bounded domain
+                and returns a piecewise linear interpolant of it, together
+                with its error.
+
+                The domain is first split in min_branches equal segments, by
+                default APPROX_MIN_BRANCHES or max_branches if fewer, which
+                are then bisected, worst first, while their error exceeds
+                abs_tol and the number of branches stays below max_branches.
+                Excluded domain ends are never sampled, the segments touching
+                them are interpolated from a node slightly inside instead.
+
+                Given a curvature_bound M, i.e. |f''| <= M on the domain, the
+                error of every segment is bounded by the Taylor remainder of
+                its interpolation nodes and the returned error is certified.
+                Otherwise it is the largest deviation observed on the probe
+                points, the quartiles of every segment, which is an estimate
+                only, as features narrower than a segment may go unseen.
+
+                Throws a ValueError if the domain is not a bounded, non empty
+                atomic interval, if abs_tol, min_branches or max_branches are
+                not positive, if a given min_branches exceeds max_branches or
+                if curvature_bound is negative.
+
+            - lower_envelope, upper_envelope: tuple of two PiecewiseFunc,
+                The pointwise minimum, respectively maximum, of the given
+                functions, over the union of their domains, along with a
+                companion function evaluating to the position of the input
+                that attains it, the first one on ties, as a float.
+
+                The breakpoints of every input are merged, and within each
+                cell in between, the envelope of the affine pieces is walked
+                exactly from crossing to crossing, adjacent pieces of the
+                same line being merged back together.
+
+                Throws a ValueError if no function is given or if a branch is
+                not affine, a TypeError if an input is not a PiecewiseFunc.
+
+            - __check_domain_validity: BranchIndex,
+                Checks if one or more branches intersect each other, sweeping
+                the sorted branch pieces in O(k).
 
                 Throws a ValueError if one or more branches intersect each other.
     """
 
+    __intern_pool: WeakValueDictionary[Tuple[Any, ...], PiecewiseFunc] = \
+        WeakValueDictionary()
+    __intern_lock = Lock()
+
     @staticmethod
     def __bound_key_func(bound: float):
         return lambda pair: pair[1] if pair[1] is not None else bound
@@ -127,34 +364,559 @@ class PiecewiseFunc(PiecewiseGeneric):
     def __init__(self,
                  branch_intervals: List[Interval],
                  branch_clbks: Sequence[Callable[[float], float]],
+                 grid_step: Optional[float] = None,
+                 cache_size: int = 0,
     ):
+        self.__stale_otherwise = False
+
         super().__init__(branch_intervals, branch_clbks)
-        self.__check_domain_validity(branch_intervals)
+
+        # the index labels pieces with stable branch ids, rather than
+        # positions, so that removing a branch relabels nothing
+        n_ids = len(self.funcs) - self.has_otherwise
+        self.__branch_ids = list(range(n_ids))
+        self.__next_id = n_ids
+        self.__clbks: Dict[int, Callable[[float], float]] = {}
+        self.__scalar_clbks: Dict[int, Callable[[float], float]] = {}
+
+        for branch_id, func in zip(self.__ids(), self.funcs):
+            self.__set_clbk(branch_id, func)
+
+        self.__grid_step = grid_step
+        self.__index = BranchIndex(self.intervals, grid_step,
+                                   self.has_otherwise)
+        self.__range_index: Optional[RangeExtremaIndex] = None
+        self.__structure: Optional[BranchStructure] = None
+        self.__check_domain_validity(self.__index)
+
+        self.__cache: Optional[ResultCache] = None
+        self.cache_size = cache_size
+        self.__key: Optional[Tuple[Any, ...]] = None
+
+    @property
+    def intervals(self) -> List[Interval]:
+        intervals = super().intervals
+
+        # the 'otherwise' interval is only rebuilt once it is asked for
+        if self.__stale_otherwise:
+            intervals[-1] = interval.from_data(self.__index.pieces_of(-1))
+            self.__stale_otherwise = False
+
+        return intervals
+
+    @property
+    def cache_size(self) -> int:
+        return 0 if self.__cache is None else self.__cache.info().maxsize
+
+    @cache_size.setter
+    def cache_size(self, maxsize: int):
+        self.__cache = ResultCache(maxsize) if maxsize else None
+
+    @property
+    def cache_info(self) -> Optional[CacheInfo]:
+        return None if self.__cache is None else self.__cache.info()
 
     def __call__(self, x: RealField) -> Iterable[Optional[float]]:
         yield from self.__apply(x)
 
-    def min(self, x: RealField) -> Tuple[int, Optional[float]]:
-        return min(enumerate(self.__apply(x)), key=self.__bound_key_func(inf))
+    def __reduce__(self):
+        return self._from_branch_table, (self.branch_table(), self.__grid_step,
+                                         self.has_otherwise, self.cache_size)
+
+    def branch_table(self) -> Tuple[Tuple[Any, ...], ...]:
+        return tuple(
+            (tuple(interval.to_data(ival)),
+             self.__coeffs_entry(func) if isinstance(func, AffineFunc) \
+                else func)
+            for ival, func in zip(self.intervals, self.funcs)
+        )
+
+    @staticmethod
+    def __coeffs_entry(func: AffineFunc) -> Tuple[Any, ...]:
+        if func.expr is None:
+            return func.slope, func.intercept
+        return func.slope, func.intercept, func.expr
+
+    @classmethod
+    def _from_branch_table(cls,
+                           table: Tuple[Tuple[Any, ...], ...],
+                           grid_step: Optional[float] = None,
+                           otherwise: bool = False,
+                           cache_size: int = 0,
+    ) -> PiecewiseFunc:
+        intervals = [interval.from_data(data) for data, _ in table]
+
+        # the 'otherwise' interval is left out, to be complemented again
+        if otherwise:
+            intervals.pop()
+
+        return cls(
+            intervals,
+            [AffineFunc(*func) if isinstance(func, tuple) else func
+             for _, func in table],
+            grid_step,
+            cache_size,
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PiecewiseFunc):
+            return NotImplemented
+        return self is other or self.__canonical() == other.__canonical()
+
+    def __hash__(self) -> int:
+        return hash(self.__canonical())
+
+    def __canonical(self) -> Tuple[Any, ...]:
+        if self.__key is not None:
+            return self.__key
+
+        pieces, branches = self.__index.entries()
+        merged: List[Tuple[Piece, Any]] = []
+
+        for piece, branch in zip(pieces, branches):
+            func = self.__clbks[branch]
+            ident = ("affine", func.slope, func.intercept, func.expr) \
+                if isinstance(func, AffineFunc) else ("callable", id(func))
+
+            # touching pieces of the same callback are merged back together
+            if merged:
+                (left, lower, upper, right), last = merged[-1]
+
+                if upper == piece[1] and (right or piece[0]) and last == ident:
+                    merged[-1] = ((left, lower, piece[2], piece[3]), ident)
+                    continue
+
+            merged.append((piece, ident))
+
+        self.__key = tuple(merged)
+
+        return self.__key
+
+    @classmethod
+    def intern(cls, pw: PiecewiseFunc) -> PiecewiseFunc:
+        key = pw.__canonical()
+
+        with cls.__intern_lock:
+            canonical = cls.__intern_pool.get(key)
+
+            # an interned function edited since then no longer matches
+            if canonical is None or canonical != pw:
+                cls.__intern_pool[key] = canonical = pw
+
+        return canonical
+
+    def insert_branch(self,
+                      branch_interval: Interval,
+                      func: Callable[[float], float],
+    ) -> int:
+        index = self.__index
+        pieces = interval.to_data(branch_interval)
+
+        # only the neighbouring pieces are checked, the 'otherwise' pieces
+        # labelled -1 are carved instead
+        if any(index.conflicts(piece) for piece in pieces):
+            raise ValueError("The inserted branch intersects one or " \
+                             "more branches")
+
+        pos, branch_id = len(self.funcs) - self.has_otherwise, self.__next_id
+
+        for piece in pieces:
+            index.insert(piece, branch_id)
+
+        super().intervals.insert(pos, branch_interval)
+        self.funcs.insert(pos, func)
+        self.__branch_ids.append(branch_id)
+        self.__set_clbk(branch_id, func)
+        self.__next_id += 1
+        self.__edited()
+
+        return pos
+
+    def remove_branch(self, pos: int) \
+            -> Tuple[Interval, Callable[[float], float]]:
+        index = self.__index
+        pos = range(len(self.funcs))[pos]
+
+        if self.has_otherwise and pos == len(self.funcs) - 1:
+            raise ValueError("The 'otherwise' branch cannot be removed, " \
+                             "replace its callback instead.")
+
+        if len(self.funcs) == 1:
+            raise ValueError("branch callbacks must not be empty")
+
+        branch_interval = super().intervals.pop(pos)
+        func = self.funcs.pop(pos)
+        branch_id = self.__branch_ids.pop(pos)
+        del self.__clbks[branch_id], self.__scalar_clbks[branch_id]
+
+        # the freed pieces fall back to the 'otherwise' branch, if any
+        for piece in interval.to_data(branch_interval):
+            index.release(piece, self.has_otherwise)
+
+        self.__edited()
+
+        return branch_interval, func
+
+    def replace_branch(self, pos: int, func: Callable[[float], float]):
+        pos = range(len(self.funcs))[pos]
+
+        self.funcs[pos] = func
+        self.__set_clbk(self.__ids()[pos], func)
+        self.__edited()
+
+    def __set_clbk(self, branch_id: int, func: Callable[[float], float]):
+        scalar_func = func
+
+        # vectorized callbacks are called on a batch of one for single values
+        if getattr(func, "vectorized", False):
+            def scalar_func(x: float) -> float:
+                return next(iter(cast(Any, func)([x])))
+
+        self.__clbks[branch_id] = func
+        self.__scalar_clbks[branch_id] = scalar_func
+
+    def __ids(self) -> List[int]:
+        # the branch id of every position, the 'otherwise' branch is -1
+        return self.__branch_ids + [-1] * self.has_otherwise
+
+    def __positions(self) -> Dict[int, int]:
+        return {branch_id: pos for pos, branch_id in enumerate(self.__ids())}
+
+    def __edited(self):
+        self.__stale_otherwise = self.has_otherwise
+        self.__range_index = None
+        self.__structure = None
+        self.__key = None
+
+        if self.__cache is not None:
+            self.__cache.clear()
+
+    def evaluate_into(self,
+                      x: RealField,
+                      out: Any,
+                      mask: Any = None,
+                      fill: float = nan,
+    ) -> int:
+        target = self.__byte_view(out, DOUBLE_FORMATS).cast("d")
+        valid = None if mask is None else self.__byte_view(mask, BYTE_FORMATS)
+
+        if isinstance(x, Sized) and (len(x) > len(target) or
+                                     (valid is not None and len(x) > len(valid))):
+            raise ValueError("Output buffers are shorter than the input.")
+
+        lookup, funcs, hits = self.__index.lookup, self.__scalar_clbks, 0
+
+        try:
+            for pos, v in enumerate(self.__as_floats(x)):
+                branch = lookup(v)
+
+                if branch is None:  # out of domain
+                    target[pos] = fill
+                else:
+                    target[pos] = funcs[branch](v)
+                    hits += 1
+
+                if valid is not None:
+                    valid[pos] = branch is not None
+        except IndexError as ex:
+            raise ValueError("Output buffers are shorter than the input.") \
+                from ex
+
+        return hits
+
+    def evaluate_batch(self, x: RealField) -> List[Optional[float]]:
+        values = list(self.__as_floats(x))
+        results: List[Optional[float]] = [None] * len(values)
+        groups: Dict[int, List[int]] = {}
+        lookup = self.__index.lookup
+
+        # positions of the input values, per active branch
+        for pos, v in enumerate(values):
+            branch = lookup(v)
+
+            if branch is not None:
+                groups.setdefault(branch, []).append(pos)
+
+        for branch, positions in groups.items():
+            func = self.__clbks[branch]
+            batch = [values[pos] for pos in positions]
+
+            if getattr(func, "vectorized", False):
+                outputs = list(cast(Any, func)(batch))
+
+                if len(outputs) != len(batch):
+                    raise ValueError("Vectorized callback of branch " \
+                                     f"{self.__positions()[branch]} " \
+                                     f"returned {len(outputs)} results for " \
+                                     f"{len(batch)} values.")
+            else:
+                outputs = [func(v) for v in batch]
+
+            for pos, output in zip(positions, outputs):
+                results[pos] = output
+
+        return results
+
+    @staticmethod
+    def __byte_view(buffer: Any, formats: Set[str]) -> memoryview:
+        try:
+            view = memoryview(buffer)
+        except TypeError as ex:
+            raise TypeError("Expected an object supporting the buffer " \
+                            "protocol.") from ex
+
+        if view.readonly:
+            raise TypeError("Expected a writable buffer.")
+
+        if view.format in formats or view.format in BYTE_FORMATS:
+            return view.cast("B")
+
+        raise TypeError(f"Expected a buffer of one of the formats " \
+                        f"{sorted(formats)} or a byte buffer, got " \
+                        f"{view.format!r}.")
+
+    def min(self, x: RealField, assume_sorted: bool = False) \
+            -> Tuple[int, Optional[float]]:
+        return self.__monotone_extremum(x, assume_sorted, -1) or \
+            min(enumerate(self.__apply(x)), key=self.__bound_key_func(inf))
+
+    def max(self, x: RealField, assume_sorted: bool = False) \
+            -> Tuple[int, Optional[float]]:
+        return self.__monotone_extremum(x, assume_sorted, 1) or \
+            max(enumerate(self.__apply(x)), key=self.__bound_key_func(-inf))
 
-    def max(self, x: RealField) -> Tuple[int, Optional[float]]:
-        return max(enumerate(self.__apply(x)), key=self.__bound_key_func(-inf))
+    def __monotone_extremum(self, x: RealField, assume_sorted: bool, sign: int) \
+            -> Optional[Tuple[int, Optional[float]]]:
+        if not (isinstance(x, range) or
+                (assume_sorted and isinstance(x, Sequence))) or not x:
+            return None
+
+        try:
+            structure = self.__shape()
+        except ValueError:  # not affine, nothing is known
+            return None
+
+        if structure.monotonicity is None or not structure.connected:
+            return None
+
+        def _eval(pos: int) -> Optional[float]:
+            return next(iter(self.__apply(x[pos])))
+
+        first, last = _eval(0), _eval(-1)
+
+        # with both ends in a connected domain, so is everything in between
+        if first is None or last is None:
+            return None
+
+        # +1 if the values are non decreasing along the input, -1 otherwise
+        trend = structure.monotonicity * (1 if x[0] <= x[-1] else -1)
+
+        if trend * sign <= 0:
+            return 0, first
+
+        # the extremum is at the end, find its first occurrence by bisection
+        lo, hi = 0, len(x) - 1
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+
+            if _eval(mid) == last:
+                hi = mid
+            else:
+                lo = mid + 1
+
+        return lo, last
+
+    def range_min(self, a: float, b: float) -> Optional[float]:
+        return self.__ranges().query(self.__bound(a), self.__bound(b))[0]
+
+    def range_max(self, a: float, b: float) -> Optional[float]:
+        return self.__ranges().query(self.__bound(a), self.__bound(b))[1]
+
+    def range_extrema(self, windows: Iterable[Tuple[float, float]]) \
+            -> Iterable[Tuple[Optional[float], Optional[float]]]:
+        query = self.__ranges().query
+
+        for a, b in windows:
+            yield query(self.__bound(a), self.__bound(b))
+
+    @staticmethod
+    def __bound(v: float) -> float:
+        # window bounds may also be given as portion's infinities
+        if v == interval.inf:
+            return inf
+        elif v == -interval.inf:
+            return -inf
+        return float(v)
+
+    def __ranges(self) -> RangeExtremaIndex:
+        # built lazily, on the first window query
+        if self.__range_index is None:
+            self.__range_index = RangeExtremaIndex(*self.__piece_coeffs())
+
+        return self.__range_index
+
+    @property
+    def is_continuous(self) -> bool:
+        return self.__shape().continuous
+
+    @property
+    def is_monotone(self) -> bool:
+        return self.__shape().monotonicity is not None
+
+    @property
+    def monotonicity(self) -> Optional[int]:
+        return self.__shape().monotonicity
+
+    @property
+    def is_convex(self) -> bool:
+        return self.__shape().convex
+
+    @property
+    def lipschitz_bound(self) -> float:
+        return self.__shape().lipschitz_bound
+
+    def __shape(self) -> BranchStructure:
+        # derived lazily from the branch coefficients, once per edit
+        if self.__structure is None:
+            self.__structure = analyze_structure(*self.__piece_coeffs())
+
+        return self.__structure
+
+    def __piece_coeffs(self) -> Tuple[List[Piece], List[Tuple[float, float]]]:
+        # every piece in sorted order, along with its branch coefficients
+        coeffs = self.__coeffs_by_id()
+        pieces, branches = self.__index.entries()
+
+        return pieces, [coeffs[branch] for branch in branches]
+
+    def to_interp_table(self) -> Tuple[List[float], List[float]]:
+        structure = self.__shape()
+        pieces, coeffs = self.__piece_coeffs()
+
+        if not pieces:
+            raise ValueError("The function has an empty domain, it cannot " \
+                             "be exported to an interpolation table.")
+
+        if not (structure.continuous and structure.connected):
+            raise ValueError("Only continuous functions on a connected " \
+                             "domain can be exported exactly to an " \
+                             "interpolation table.")
+
+        for (_, lower, upper, _), (slope, _) in ((pieces[0], coeffs[0]),
+                                                 (pieces[-1], coeffs[-1])):
+            if slope and (lower == -inf or upper == inf):
+                raise ValueError("An unbounded branch with a non zero " \
+                                 "slope cannot be exported exactly to an " \
+                                 "interpolation table.")
+
+        xp: List[float] = []
+        fp: List[float] = []
+
+        for (_, lower, upper, _), (slope, intercept) in zip(pieces, coeffs):
+            for x in (lower, upper):
+                # joints are shared by continuity, unbounded ends are constant
+                if -inf < x < inf and (not xp or xp[-1] < x):
+                    xp.append(x)
+                    fp.append(slope * x + intercept)
+
+        if not xp:  # constant on the whole real line
+            xp, fp = [0.], [coeffs[0][1]]
+
+        return xp, fp
+
+    def to_numpy_piecewise(self, x: RealField) \
+            -> Tuple[List[Any], List[Any]]:
+        funcs, lookup, positions = self.funcs, self.__index.lookup, \
+            self.__positions()
+        branches = [lookup(v) for v in self.__as_floats(x)]
+        branches = [b if b is None else positions[b] for b in branches]
+
+        condlist: List[Any] = [[b == branch for b in branches]
+                               for branch in range(len(funcs))]
+
+        # numpy expects scalar conditions for a scalar input
+        if not isinstance(x, Iterable):
+            condlist = [cond for cond, in condlist]
+        funclist: List[Any] = [
+            func.intercept if isinstance(func, AffineFunc) and not func.slope
+            else func
+            for func in funcs
+        ]
+
+        # default for the values outside of every branch
+        funclist.append(nan)
+
+        return condlist, funclist
+
+    def derivative(self) -> PiecewiseFunc:
+        return type(self)(
+            list(self.intervals),
+            [AffineFunc(0., slope) for slope, _ in self.__affine_coeffs()],
+        )
+
+    def subgradient(self, x: RealField) \
+            -> Iterable[Tuple[Optional[float], Optional[float]]]:
+        slopes = {branch: slope
+                  for branch, (slope, _) in self.__coeffs_by_id().items()}
+        index = self.__index
+
+        def _slope(branch: Optional[int]) -> Optional[float]:
+            return None if branch is None else slopes[branch]
+
+        for v in self.__as_floats(x):
+            yield _slope(index.lookup_left(v)), _slope(index.lookup_right(v))
+
+    def __affine_coeffs(self) -> List[Tuple[float, float]]:
+        coeffs = []
+
+        for pos, func in enumerate(self.funcs):
+            if not isinstance(func, AffineFunc):
+                raise ValueError(f"Branch {pos} is not affine, its " \
+                                 "coefficients are unknown.")
+            coeffs.append((func.slope, func.intercept))
+
+        return coeffs
+
+    def __coeffs_by_id(self) -> Dict[int, Tuple[float, float]]:
+        return dict(zip(self.__ids(), self.__affine_coeffs()))
+
+    @staticmethod
+    def __as_floats(x: RealField) -> Iterable[float]:
+        if not isinstance(x, Iterable):
+            x = (x, )
+
+        for v in x:
+            try:
+                yield float(v)
+            except (TypeError, ValueError) as ex:
+                raise TypeError("Input values to piecewise function should " \
+                                "either be castable to or subclass type float.") \
+                    from ex
 
     def __apply(self, x: RealField) -> Iterable[Optional[float]]:
-        def _eval(scalar: float) -> Optional[float]:
-            sel_func : Callable[[float], Optional[float]]  # for type hinting
+        lookup, funcs, cache = self.__index.lookup, self.__scalar_clbks, \
+            self.__cache
+
+        def _select(key: float, scalar: float) -> Optional[float]:
+            # select the active branch
+            branch = lookup(key)
+
+            if branch is None:  # out of domain
+                return None
+            return funcs[branch](scalar)
 
+        def _eval(scalar: float) -> Optional[float]:
             try:
-                # select the active branch
-                sel_func = next(compress(self.funcs,
-                                (float(scalar) in ival for ival in self.intervals)))
-            except StopIteration:
-                sel_func = lambda _: None  # out of domain callback
+                key = float(scalar)
             except (TypeError, ValueError) as ex:
                 raise TypeError("Input values to piecewise function should " \
                                 "either be castable to or subclass type float.") \
                     from ex
-            return sel_func(scalar)
+
+            if cache is None:
+                return _select(key, scalar)
+            return cache.get(key, lambda: _select(key, scalar))
                  
         # promote float  to an iterable, e.g. tuple
         if not isinstance(x, Iterable):
@@ -163,8 +925,8 @@ class PiecewiseFunc(PiecewiseGeneric):
         yield from (_eval(v) for v in x)
 
     @staticmethod
-    def __check_domain_validity(intervals: List[Interval]):
-        if any(starmap(and_, combinations(intervals, 2))):
+    def __check_domain_validity(index: BranchIndex):
+        if index.has_overlaps():
             raise ValueError("One or more branches have intersecting intervals")
 
     @classmethod
@@ -205,4 +967,232 @@ class PiecewiseFunc(PiecewiseGeneric):
         intervals = [boolop_to_interval(node) for node in interval_nodes]
         callbacks = [node_to_func(node) for node in callback_nodes]
 
-        return cls(intervals, callbacks)
\ No newline at end of file
+        return cls(intervals, callbacks)
+
+    @classmethod
+    def approximate(cls,
+                    func: Callable[[float], float],
+                    domain: Interval,
+                    abs_tol: float,
+                    max_branches: int = 1024,
+                    min_branches: Optional[int] = None,
+                    curvature_bound: Optional[float] = None,
+    ) -> Tuple[PiecewiseFunc, float]:
+        if domain.empty or not domain.atomic or \
+                domain.lower == -interval.inf or domain.upper == interval.inf:
+            raise ValueError("Approximation domain must be a bounded, " \
+                             "non empty atomic interval.")
+
+        if abs_tol <= 0 or max_branches < 1:
+            raise ValueError("abs_tol and max_branches must be positive.")
+
+        if min_branches is None:
+            min_branches = min(APPROX_MIN_BRANCHES, max_branches)
+        elif not 1 <= min_branches <= max_branches:
+            raise ValueError("min_branches must be positive, and at most " \
+                             "max_branches.")
+
+        if curvature_bound is not None and curvature_bound < 0:
+            raise ValueError("curvature_bound must not be negative.")
+
+        lower, upper = float(domain.lower), float(domain.upper)
+        samples = {}
+
+        def _sample(x: float) -> float:
+            if x not in samples:
+                samples[x] = float(func(x))
+            return samples[x]
+
+        def _nodes(lo: float, hi: float) -> Tuple[float, float]:
+            # excluded domain ends are sampled slightly inside
+            offset = APPROX_OPEN_END_OFFSET * (hi - lo)
+
+            if lo == lower and domain.left == interval.OPEN:
+                lo += offset
+            if hi == upper and domain.right == interval.OPEN:
+                hi -= offset
+            return lo, hi
+
+        def _line(lo: float, hi: float) -> Tuple[float, float]:
+            p, q = _nodes(lo, hi)
+            slope = (_sample(q) - _sample(p)) / (q - p)
+
+            return slope, _sample(p) - slope * p
+
+        def _error(lo: float, hi: float) -> float:
+            slope, intercept = _line(lo, hi)
+            probes = (lo + t * (hi - lo) for t in (.25, .5, .75))
+            error = max(abs(_sample(x) - (slope * x + intercept))
+                        for x in probes)
+
+            if curvature_bound is None:
+                return error
+
+            # |f - line| <= M/2 |(x - p)(x - q)| for the nodes p, q of the line
+            p, q = _nodes(lo, hi)
+            spread = max((q - p) ** 2 / 4, (p - lo) * (q - lo),
+                         (hi - p) * (hi - q))
+
+            return max(error, curvature_bound / 2 * spread)
+
+        if lower == upper:  # singleton domain
+            return cls([domain], [AffineFunc(0., _sample(lower))]), 0.
+
+        step = (upper - lower) / min_branches
+        cuts = [lower + j * step for j in range(min_branches)] + [upper]
+
+        # max-heap of segments keyed on their error
+        heap = [(-_error(lo, hi), lo, hi)
+                for lo, hi in zip(cuts, cuts[1:]) if lo < hi]
+        heapify(heap)
+        done: List[Tuple[float, float, float]] = []
+
+        while heap and len(heap) + len(done) < max_branches:
+            neg_err, lo, hi = heappop(heap)
+            mid = (lo + hi) / 2
+
+            if -neg_err <= abs_tol or not lo < mid < hi:
+                done.append((neg_err, lo, hi))
+                continue
+
+            heappush(heap, (-_error(lo, mid), lo, mid))
+            heappush(heap, (-_error(mid, hi), mid, hi))
+
+        segments = sorted((lo, hi) for _, lo, hi in heap + done)
+        intervals, callbacks = [], []
+
+        for lo, hi in segments:
+            intervals.append(interval.closedopen(lo, hi))
+            callbacks.append(AffineFunc(*_line(lo, hi)))
+
+        intervals[0] = intervals[0].replace(left=domain.left)
+        intervals[-1] = intervals[-1].replace(right=domain.right)
+
+        return cls(intervals, callbacks), max(-e for e, _, _ in heap + done)
+
+    @classmethod
+    def lower_envelope(cls, funcs: Sequence[PiecewiseFunc]) \
+            -> Tuple[PiecewiseFunc, PiecewiseFunc]:
+        return cls.__envelope(funcs, 1)
+
+    @classmethod
+    def upper_envelope(cls, funcs: Sequence[PiecewiseFunc]) \
+            -> Tuple[PiecewiseFunc, PiecewiseFunc]:
+        return cls.__envelope(funcs, -1)
+
+    @classmethod
+    def __envelope(cls, funcs: Sequence[PiecewiseFunc], sign: int) \
+            -> Tuple[PiecewiseFunc, PiecewiseFunc]:
+        if not funcs:
+            raise ValueError("Expected one or more functions.")
+
+        if not all(isinstance(f, PiecewiseFunc) for f in funcs):
+            raise TypeError("Envelopes can only be taken of PiecewiseFunc " \
+                            "objects.")
+
+        # the upper envelope is the lower envelope of the negated lines
+        tables = [(f.__index.lookup,
+                   {branch: (sign * slope, sign * intercept)
+                    for branch, (slope, intercept)
+                    in f.__coeffs_by_id().items()})
+                  for f in funcs]
+
+        breakpoints = sorted({bound for f in funcs
+                              for _, lower, upper, _ in f.__index.entries()[0]
+                              for bound in (lower, upper)
+                              if -inf < bound < inf})
+
+        # (piece, winner, line) triples, in sorted order
+        atoms: List[Tuple[Piece, int, Tuple[float, float]]] = []
+
+        def _lines(x: float) -> List[Tuple[float, float, int]]:
+            lines = []
+
+            for pos, (lookup, coeffs) in enumerate(tables):
+                branch = lookup(x)
+
+                if branch is not None:
+                    lines.append((*coeffs[branch], pos))
+            return lines
+
+        def _emit(piece: Piece, line: Tuple[float, float, int]):
+            slope, intercept, pos = line
+            atoms.append((piece, pos, (sign * slope, sign * intercept)))
+
+        def _walk(lo: float, hi: float, lines: List[Tuple[float, float, int]]):
+            # the lowest line right after lo, the steepest one at -inf
+            if lo == -inf:
+                best = min(lines, key=lambda l: (-l[0], l[1], l[2]))
+            else:
+                best = min(lines, key=lambda l: (l[0] * lo + l[1], l[0], l[2]))
+
+            x = lo
+
+            while True:
+                # only flatter lines may cross the current one further right
+                crossings = [((l[1] - best[1]) / (best[0] - l[0]), l)
+                             for l in lines if l[0] < best[0]]
+                crossings = [(cx, l) for cx, l in crossings if x < cx < hi]
+
+                if not crossings:
+                    _emit((False, x, hi, False), best)
+                    return
+
+                cx = min(c for c, _ in crossings)
+                tied = [l for c, l in crossings if c == cx]
+
+                _emit((False, x, cx, False), best)
+                _emit((True, cx, cx, True), min(tied + [best],
+                                               key=lambda l: l[2]))
+
+                best, x = min(tied, key=lambda l: (l[0], l[2])), cx
+
+        bounds = [-inf, *breakpoints, inf]
+
+        for lo, hi in zip(bounds, bounds[1:]):
+            if lo > -inf:
+                lines = _lines(lo)
+
+                if lines:
+                    _emit((True, lo, lo, True),
+                          min(lines, key=lambda l: (l[0] * lo + l[1], l[2])))
+
+            # a point of the open cell, every input is affine or undefined on it
+            if lo == -inf:
+                probe = 0. if hi == inf else hi - max(1., abs(hi))
+            elif hi == inf:
+                probe = lo + max(1., abs(lo))
+            else:
+                probe = (lo + hi) / 2
+
+            lines = _lines(probe)
+
+            if lines:
+                _walk(lo, hi, lines)
+
+        merged: List[Tuple[Piece, int, Tuple[float, float]]] = []
+
+        for piece, pos, line in atoms:
+            if merged:
+                (left, lower, upper, right), last_pos, last_line = merged[-1]
+
+                if upper == piece[1] and (right or piece[0]) and \
+                        last_pos == pos and last_line == line:
+                    merged[-1] = ((left, lower, piece[2], piece[3]), pos, line)
+                    continue
+
+            merged.append((piece, pos, line))
+
+        by_line: Dict[Tuple[float, float], List[Piece]] = {}
+        by_pos: Dict[int, List[Piece]] = {}
+
+        for piece, pos, line in merged:
+            by_line.setdefault(line, []).append(piece)
+            by_pos.setdefault(pos, []).append(piece)
+
+        envelope = cls([interval.from_data(pieces) for pieces in by_line.values()],
+                       [AffineFunc(*line) for line in by_line])
+        winner = cls([interval.from_data(pieces) for pieces in by_pos.values()],
+                     [AffineFunc(0., float(pos)) for pos in by_pos])
+
+        return envelope, winner
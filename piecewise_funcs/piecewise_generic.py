@@ -1,8 +1,6 @@
 from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
-from functools import reduce
-from operator import or_
 from typing import Callable, Iterable, List, Optional, Sequence, Tuple
 
 from portion.interval import Interval
@@ -23,9 +21,11 @@ class PiecewiseGeneric(metaclass=ABCMeta):
                 branched domain of their corresponding callback.
             - funcs: sequence of callables being evaluated as callbacks
                 upon activation of their corresponding branch.
+            - has_otherwise: bool, whether the last branch is an 'otherwise'
+                branch, whose interval is the complement of all the others.
     """
 
-    __slots__ = ("__intervals", "__funcs")
+    __slots__ = ("__intervals", "__funcs", "__otherwise")
 
     def __init__(self, 
                  branch_intervals: List[interval],
@@ -50,25 +50,31 @@ class PiecewiseGeneric(metaclass=ABCMeta):
                 "equal in length, or in case of an 'otherwise' branch " \
                 "the branch callbacks sequence must only have an extra item."
 
-        if (len(branch_clbks) - len(branch_intervals)) == 1:
-            otherwise = reduce(or_, branch_intervals or [interval.empty()])
+        # own copies, so that branches can be edited in place
+        branch_intervals = list(branch_intervals)
+        branch_clbks = list(branch_clbks)
 
-            if not hasattr(branch_intervals, 'append'):
-                branch_intervals = list(branch_intervals)
+        self.__otherwise = len(branch_clbks) - len(branch_intervals) == 1
 
-            branch_intervals.append(~otherwise)
+        if self.__otherwise:
+            # a single union sorts and merges the pieces in O(k log k)
+            branch_intervals.append(~Interval(*branch_intervals))
 
         self.__intervals = branch_intervals
         self.__funcs = branch_clbks
 
     @property
-    def intervals(self) -> Sequence[interval]:
+    def intervals(self) -> List[interval]:
         return self.__intervals
 
     @property
-    def funcs(self) -> Sequence[Callable[[float], float]]:
+    def funcs(self) -> List[Callable[[float], float]]:
         return self.__funcs
 
+    @property
+    def has_otherwise(self) -> bool:
+        return self.__otherwise
+
     @abstractmethod
     def __call__(self, x: RealField) -> Iterable[Optional[float]]:
         pass
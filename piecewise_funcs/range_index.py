@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from math import inf
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from .branch_index import Piece
+
+class RangeExtremaIndex:
+    """
+        Range extrema index of a piecewise function with affine branches.
+
+        Keeps the infimum and supremum of every atomic branch piece in a
+        pair of bottom-up segment trees, built in O(k), so that the extrema
+        over any window [a, b] are answered exactly in O(log k): the pieces
+        fully inside the window are read off the trees, while the two pieces
+        straddling its ends are clipped and evaluated directly.
+
+        Extrema are infima and suprema, i.e. the bound of an open branch
+        endpoint counts even if it is not attained.
+
+        Methods:
+            - query: tuple of floats or Nones,
+                The infimum and supremum over the part of the window that
+                lies in the domain, or a pair of Nones if the window misses
+                the domain altogether.
+    """
+
+    __slots__ = ("__keys", "__upper_keys", "__pieces", "__coeffs",
+                 "__mins", "__maxs")
+
+    def __init__(self,
+                 pieces: Sequence[Piece],
+                 coeffs: Sequence[Tuple[float, float]],
+    ):
+        self.__keys = [(lower, not left) for left, lower, _, _ in pieces]
+        self.__upper_keys = [(upper, right) for _, _, upper, right in pieces]
+        self.__pieces = pieces
+        self.__coeffs = coeffs
+
+        extrema = [self.__extrema(lower, upper, *c)
+                   for (_, lower, upper, _), c in zip(pieces, coeffs)]
+
+        self.__mins = self.__build([lo for lo, _ in extrema], min)
+        self.__maxs = self.__build([hi for _, hi in extrema], max)
+
+    def query(self, a: float, b: float) \
+            -> Tuple[Optional[float], Optional[float]]:
+        # first piece reaching a and last piece starting at or before b
+        first = bisect_left(self.__upper_keys, (a, True))
+        last = bisect_right(self.__keys, (b, False)) - 1
+
+        if a > b or first > last:
+            return None, None
+
+        edges = [self.__clipped_extrema(pos, a, b) for pos in {first, last}]
+
+        lo = min(lo for lo, _ in edges)
+        hi = max(hi for _, hi in edges)
+
+        if first + 1 < last:
+            lo = min(lo, self.__query(self.__mins, first + 1, last, min, inf))
+            hi = max(hi, self.__query(self.__maxs, first + 1, last, max, -inf))
+
+        return lo, hi
+
+    def __clipped_extrema(self, pos: int, a: float, b: float) \
+            -> Tuple[float, float]:
+        _, lower, upper, _ = self.__pieces[pos]
+
+        return self.__extrema(max(lower, a), min(upper, b), *self.__coeffs[pos])
+
+    @staticmethod
+    def __extrema(lower: float, upper: float, slope: float, intercept: float) \
+            -> Tuple[float, float]:
+        if not slope:  # also avoids 0 * inf at unbounded ends
+            return intercept, intercept
+
+        ends = (slope * lower + intercept, slope * upper + intercept)
+
+        return min(ends), max(ends)
+
+    @staticmethod
+    def __build(leaves: List[float], op: Callable[[float, float], float]) \
+            -> List[float]:
+        n = len(leaves)
+        tree = [0.] * n + leaves
+
+        for i in range(n - 1, 0, -1):
+            tree[i] = op(tree[2 * i], tree[2 * i + 1])
+
+        return tree
+
+    @staticmethod
+    def __query(tree: List[float],
+                lo: int,
+                hi: int,
+                op: Callable[[float, float], float],
+                neutral: float,
+    ) -> float:
+        # extremum over the leaves lo..hi-1
+        n, result = len(tree) // 2, neutral
+        lo, hi = lo + n, hi + n
+
+        while lo < hi:
+            if lo & 1:
+                result = op(result, tree[lo])
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                result = op(result, tree[hi])
+            lo, hi = lo // 2, hi // 2
+
+        return result
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, NamedTuple
+
+# the hit rate is reviewed every WINDOW lookups, the cache is bypassed for
+# BYPASS_WINDOWS windows whenever it falls below MIN_HIT_RATE
+WINDOW = 1024
+MIN_HIT_RATE = .05
+BYPASS_WINDOWS = 64
+
+_MISSING = object()
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+    bypassed: bool
+
+
+class ResultCache:
+    """
+        Thread safe, bounded LRU cache of evaluation results, keyed on the
+        float input.
+
+        The hit rate is reviewed every WINDOW lookups, if it is too low for
+        the cache to pay off, lookups bypass it, straight to the computation,
+        for the following BYPASS_WINDOWS windows before it is probed again.
+
+        Methods:
+            - get: the cached result for the key, computing and storing it
+                on a miss. The computation runs outside of the lock.
+
+            - clear: None,
+                Drops every cached result, resetting the counters.
+
+            - info: CacheInfo, the hits, misses, maximum and current sizes
+                and whether the cache is currently bypassed.
+    """
+
+    __slots__ = ("__maxsize", "__data", "__lock", "__hits", "__misses",
+                 "__window_hits", "__window_lookups", "__bypass")
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError("Cache size must be positive.")
+
+        self.__maxsize = maxsize
+        self.__data: OrderedDict[float, Any] = OrderedDict()
+        self.__lock = Lock()
+        self.__hits = self.__misses = 0
+        self.__window_hits = self.__window_lookups = 0
+        self.__bypass = 0
+
+    def get(self, key: float, compute: Callable[[], Any]) -> Any:
+        with self.__lock:
+            bypassed = self.__bypass > 0
+
+            if bypassed:
+                self.__bypass -= 1
+                value = _MISSING
+            else:
+                value = self.__data.get(key, _MISSING)
+
+                if value is not _MISSING:
+                    self.__data.move_to_end(key)
+                    self.__hits += 1
+                    self.__window_hits += 1
+
+                self.__review()
+
+        if bypassed:
+            return compute()
+        elif value is not _MISSING:
+            return value
+
+        value = compute()
+
+        with self.__lock:
+            self.__misses += 1
+
+            # unless the review above turned the bypass on
+            if not self.__bypass:
+                self.__data[key] = value
+
+                if len(self.__data) > self.__maxsize:
+                    self.__data.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+            self.__hits = self.__misses = 0
+            self.__window_hits = self.__window_lookups = 0
+            self.__bypass = 0
+
+    def info(self) -> CacheInfo:
+        with self.__lock:
+            return CacheInfo(self.__hits, self.__misses, self.__maxsize,
+                             len(self.__data), self.__bypass > 0)
+
+    def __review(self):
+        self.__window_lookups += 1
+
+        if self.__window_lookups < WINDOW:
+            return
+
+        if self.__window_hits < MIN_HIT_RATE * WINDOW:
+            self.__bypass = BYPASS_WINDOWS * WINDOW
+            self.__data.clear()
+
+        self.__window_hits = self.__window_lookups = 0
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from math import inf, isclose
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+from .branch_index import Piece
+
+# tolerance of continuity checks, e.g. for interpolants whose coefficients
+# went through rounding
+CONTINUITY_REL_TOL = 1e-9
+CONTINUITY_ABS_TOL = 1e-12
+
+class BranchStructure(NamedTuple):
+    """
+        Structural properties of a piecewise function with affine branches.
+
+        Attrs:
+            - continuous: bool, whether the function is continuous on its
+                domain, i.e. adjacent branch pieces meet at the same value.
+            - connected: bool, whether the domain is a single interval.
+            - monotonicity: int or None, 1 if the function is non decreasing,
+                -1 if it is non increasing, 0 if it is constant and None if
+                it is neither. Checked exactly, without tolerance.
+            - convex: bool, whether the function is convex, i.e. continuous
+                on a connected domain with non decreasing slopes.
+            - lipschitz_bound: float, the smallest Lipschitz constant of
+                the function, infinite if it jumps.
+    """
+
+    continuous: bool
+    connected: bool
+    monotonicity: Optional[int]
+    convex: bool
+    lipschitz_bound: float
+
+
+def analyze_structure(pieces: Sequence[Piece],
+                      coeffs: Sequence[Tuple[float, float]],
+) -> BranchStructure:
+    def _value(x: float, slope: float, intercept: float) -> float:
+        return intercept if not slope else slope * x + intercept
+
+    continuous, connected = True, True
+    increasing, decreasing = True, True
+    lipschitz = 0.
+
+    # slopes of the pieces with a positive length, in order
+    slopes = [slope for (_, lower, upper, _), (slope, _) in zip(pieces, coeffs)
+              if lower < upper]
+
+    for slope in slopes:
+        increasing &= slope >= 0
+        decreasing &= slope <= 0
+        lipschitz = max(lipschitz, abs(slope))
+
+    for (p, p_coeffs), (q, q_coeffs) in zip(zip(pieces, coeffs),
+                                            zip(pieces[1:], coeffs[1:])):
+        _, _, end, p_right = p
+        q_left, start, _, _ = q
+
+        # limits at the end of p and at the start of q
+        v_end, v_start = _value(end, *p_coeffs), _value(start, *q_coeffs)
+
+        increasing &= v_end <= v_start
+        decreasing &= v_end >= v_start
+
+        meets = isclose(v_end, v_start, rel_tol=CONTINUITY_REL_TOL,
+                        abs_tol=CONTINUITY_ABS_TOL)
+
+        if end == start and (p_right or q_left):
+            continuous &= meets
+        else:
+            # a hole in the domain, bridged by a chord for the Lipschitz bound
+            connected = False
+
+            if end < start:
+                lipschitz = max(lipschitz, abs(v_start - v_end) / (start - end))
+            elif not meets:
+                lipschitz = inf
+
+    if not continuous:
+        lipschitz = inf
+
+    monotonicity = None
+
+    if increasing and decreasing:
+        monotonicity = 0
+    elif increasing:
+        monotonicity = 1
+    elif decreasing:
+        monotonicity = -1
+
+    convex = continuous and connected and \
+        all(s <= t for s, t in zip(slopes, slopes[1:]))
+
+    return BranchStructure(continuous, connected, monotonicity, convex,
+                           lipschitz)
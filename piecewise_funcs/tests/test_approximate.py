@@ -0,0 +1,100 @@
+from math import exp, log, sin
+
+from ..piecewise_function import PiecewiseFunc
+
+import portion as p
+import pytest
+
+def test_approximate_linear_is_exact():
+    pw, err = PiecewiseFunc.approximate(lambda x: 3*x - 1, p.closed(-2, 2), 1e-9,
+                                        min_branches=1)
+
+    assert err < 1e-9
+    assert len(pw.intervals) == 1
+    assert [*pw([-2, 0, 2])] == [-7, -1, 5]
+
+def test_approximate_within_tolerance():
+    pw, err = PiecewiseFunc.approximate(exp, p.closed(0, 3), 1e-3)
+
+    assert err <= 1e-3
+
+    x = [i / 97 * 3 for i in range(98)]
+
+    assert max(abs(y - exp(v)) for v, y in zip(x, pw(x))) < 2e-3
+
+def test_approximate_respects_domain_bounds():
+    pw, _ = PiecewiseFunc.approximate(sin, p.closedopen(0, 3), 1e-2)
+
+    assert pw.intervals[0].left == p.CLOSED
+    assert pw.intervals[-1].right == p.OPEN
+    assert [*pw([-1, 3])] == [None, None]
+
+def test_approximate_open_domain():
+    pw, err = PiecewiseFunc.approximate(log, p.open(0, 1), 1e-3)
+
+    assert pw.intervals[0].left == p.OPEN
+    assert next(iter(pw(.5))) == pytest.approx(log(.5), abs=2e-3)
+
+    pw, err = PiecewiseFunc.approximate(lambda x: 1 / x, p.openclosed(0, 1),
+                                        1e-3, max_branches=64)
+
+    assert len(pw.intervals) == 64
+    assert err > 1e-3
+
+def test_approximate_certified_error():
+    pw, err = PiecewiseFunc.approximate(sin, p.closed(0, 10), 1e-3,
+                                        curvature_bound=1)
+
+    x = [i / 10000 * 10 for i in range(10001)]
+
+    assert err <= 1e-3
+    assert max(abs(y - sin(v)) for v, y in zip(x, pw(x))) <= err
+
+def test_approximate_narrow_feature():
+    spike = lambda x: exp(-((x - .3) * 1000) ** 2)
+
+    # missed by the probes, without a bound the error is an estimate only
+    _, err = PiecewiseFunc.approximate(spike, p.closed(0, 1), 1e-2)
+    assert err < 1e-2
+
+    pw, err = PiecewiseFunc.approximate(spike, p.closed(0, 1), 1e-2,
+                                        max_branches=8192,
+                                        curvature_bound=2e6)
+
+    assert err <= 1e-2
+    assert next(iter(pw(.3))) == pytest.approx(1, abs=1e-2)
+
+def test_approximate_max_branches():
+    pw, err = PiecewiseFunc.approximate(sin, p.closed(0, 30), 1e-9,
+                                        max_branches=8)
+
+    assert len(pw.intervals) == 8
+    assert err > 1e-9
+
+def test_approximate_illegal_args():
+    with pytest.raises(ValueError):
+        PiecewiseFunc.approximate(sin, p.closed(0, p.inf), 1e-3)
+
+    with pytest.raises(ValueError):
+        PiecewiseFunc.approximate(sin, p.closed(0, 1) | p.closed(2, 3), 1e-3)
+
+    with pytest.raises(ValueError):
+        PiecewiseFunc.approximate(sin, p.closed(0, 1), 0)
+
+    with pytest.raises(ValueError):
+        PiecewiseFunc.approximate(sin, p.closed(0, 1), 1e-3, max_branches=4,
+                                  min_branches=8)
+
+    with pytest.raises(ValueError):
+        PiecewiseFunc.approximate(sin, p.closed(0, 1), 1e-3, min_branches=0)
+
+    with pytest.raises(ValueError):
+        PiecewiseFunc.approximate(sin, p.closed(0, 1), 1e-3, max_branches=0)
+
+    # the default min_branches gives way to a smaller max_branches
+    pw, _ = PiecewiseFunc.approximate(sin, p.closed(0, 1), 1e-3, 4)
+    assert len(pw.intervals) == 4
+
+    with pytest.raises(ValueError):
+        PiecewiseFunc.approximate(sin, p.closed(0, 1), 1e-3,
+                                  curvature_bound=-1)
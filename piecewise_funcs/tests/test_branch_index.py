@@ -0,0 +1,155 @@
+from ..branch_index import BranchIndex
+from ..piecewise_function import PiecewiseFunc
+
+import portion as p
+import pytest
+
+def _grid_intervals(n, x0=0., step=.5):
+    return [p.closedopen(x0 + i*step, x0 + (i+1)*step) for i in range(n)]
+
+def _probes(n, x0=0., step=.5):
+    return [x0 + i*step/4 for i in range(-8, 4*n + 8)] + \
+           [float('-inf'), float('inf')]
+
+def test_lookup_matches_interval_membership():
+    intervals = [p.open(-p.inf, -3), p.singleton(-1), p.closed(0, 1),
+                 p.open(1, 2) | p.closed(5, 6), p.openclosed(7, 9)]
+    index = BranchIndex(intervals)
+
+    for x in [-10, -3, -1, -.5, 0, .5, 1, 1.5, 2, 5, 6, 7, 8, 9, 10]:
+        expected = next((i for i, ival in enumerate(intervals) if x in ival),
+                        None)
+        assert index.lookup(x) == expected
+
+    # infinities belong to the unbounded branches, as with portion
+    intervals = [p.open(5, p.inf), p.open(-p.inf, -5)]
+    pw = PiecewiseFunc(intervals, [lambda x: 1, lambda x: 2*x])
+
+    for x in [float('inf'), float('-inf')]:
+        expected = next((i for i, ival in enumerate(intervals) if x in ival),
+                        None)
+        assert BranchIndex(intervals).lookup(x) == expected
+
+    assert [*pw([float('inf'), float('-inf')])] == [1, float('-inf')]
+    assert BranchIndex([p.open(-p.inf, p.inf)]).lookup(float('-inf')) == 0
+    assert BranchIndex([p.open(-p.inf, p.inf)]).lookup(float('inf')) == 0
+    assert BranchIndex([p.closed(0, 1)]).lookup(float('inf')) is None
+
+def test_uniform_grid_detected():
+    intervals = _grid_intervals(100)
+    grid_index = BranchIndex(intervals)
+
+    for x in _probes(100):
+        expected = next((i for i, ival in enumerate(intervals) if x in ival),
+                        None)
+        assert grid_index.lookup(x) == expected
+
+    assert grid_index.lookup(float('nan')) is None
+
+def test_grid_step_hint_with_irregular_breakpoints():
+    intervals = _grid_intervals(50, step=1.) + [p.singleton(60.5)]
+    index = BranchIndex(intervals, grid_step=1.)
+
+    assert index.lookup(60.5) == 50
+    assert index.lookup(60.) is None
+    assert [index.lookup(x + .5) for x in range(50)] == [*range(50)]
+
+def test_grid_step_illegal_hint():
+    with pytest.raises(ValueError):
+        BranchIndex(_grid_intervals(10), grid_step=0)
+
+    with pytest.raises(ValueError):
+        BranchIndex(_grid_intervals(10), grid_step=-.5)
+
+def test_sparse_grid_step_hint():
+    intervals = [p.closedopen(0, .5), p.closedopen(100, 100.5),
+                 p.closedopen(37, 37.5)]
+    pw = PiecewiseFunc(intervals, [lambda x: 1, lambda x: 2, lambda x: 3],
+                       grid_step=.5)
+
+    assert [*pw([0, .25, .5, 37.2, 99.9, 100, 100.5])] == \
+        [1, 1, None, 3, None, 2, None]
+
+    # far too fine, the lookups fall back to bisection
+    index = BranchIndex(_grid_intervals(10), grid_step=1e-6)
+
+    for x in _probes(10):
+        expected = next((i for i, ival in enumerate(_grid_intervals(10))
+                         if x in ival), None)
+        assert index.lookup(x) == expected
+
+def test_coarse_grid_step_hint():
+    bounds = sorted({(i * 7919 % 1000) / 10 for i in range(400)})
+    intervals = [p.closedopen(lo, hi) for lo, hi in zip(bounds, bounds[1:])]
+    index = BranchIndex(intervals, grid_step=(bounds[-1] - bounds[0]) / 4)
+    probes = [x / 8 for x in range(-16, 820)] + [float('-inf'),
+                                                float('inf'), *bounds]
+
+    for x in probes:
+        expected = next((i for i, ival in enumerate(intervals) if x in ival),
+                        None)
+        assert index.lookup(x) == expected
+
+    with pytest.raises(ValueError):
+        BranchIndex([p.open(-p.inf, p.inf)], grid_step=-1)
+
+def test_piecewise_func_on_grid():
+    pw = PiecewiseFunc(_grid_intervals(64),
+                       [(lambda i: lambda x: i)(i) for i in range(64)])
+
+    assert [*pw([-1, 0, .25, 31.75, 32])] == [None, 0, 0, 63, None]
+
+def test_overlaps():
+    assert BranchIndex([p.closed(0, 1), p.closed(1, 2)]).has_overlaps()
+    assert BranchIndex([p.closed(0, 5), p.open(1, 2)]).has_overlaps()
+    assert not BranchIndex([p.closed(0, 1), p.openclosed(1, 2)]).has_overlaps()
+
+def test_singleton_points():
+    intervals = _grid_intervals(20) + [p.singleton(100 + i/3) for i in range(50)]
+    index = BranchIndex(intervals)
+
+    for x in _probes(20) + [100 + i/3 for i in range(50)] + [100.1, 200]:
+        expected = next((i for i, ival in enumerate(intervals) if x in ival),
+                        None)
+        assert index.lookup(x) == expected
+
+def test_singleton_overlaps():
+    assert BranchIndex([p.singleton(1), p.singleton(1)]).has_overlaps()
+    assert BranchIndex([p.closedopen(0, 2), p.singleton(1)]).has_overlaps()
+    assert BranchIndex([p.closed(0, 1), p.singleton(1)]).has_overlaps()
+    assert not BranchIndex([p.closedopen(0, 1), p.singleton(1)]).has_overlaps()
+
+    with pytest.raises(ValueError):
+        PiecewiseFunc([p.open(0, 2), p.singleton(1)],
+                      [lambda x: 1, lambda x: 2])
+
+def test_singleton_edits():
+    pw = PiecewiseFunc([p.closedopen(0, 10)] + [p.singleton(20 + i)
+                                                for i in range(5)],
+                       [lambda x: 0] + [(lambda i: lambda x: i)(i)
+                                        for i in range(1, 6)] + [lambda x: -1])
+
+    with pytest.raises(ValueError):
+        pw.insert_branch(p.singleton(22), lambda x: 9)
+
+    with pytest.raises(ValueError):
+        pw.insert_branch(p.closed(19, 21), lambda x: 9)
+
+    pw.insert_branch(p.singleton(15) | p.singleton(30), lambda x: 9)
+    assert [*pw([15, 30, 4, 29])] == [9, 9, 0, -1]
+
+    pw.insert_branch(p.open(10, 15), lambda x: 7)
+    pw.remove_branch(2)
+
+    x = [5, 9.5, 10, 12, 15, 16, 20, 21, 22, 23, 24, 30, 31]
+
+    assert [*pw(x)] == [0, 0, -1, 7, 9, -1, 1, -1, 3, 4, 5, 9, -1]
+    assert pw.intervals[-1] == ~p.Interval(*pw.intervals[:-1])
+
+def test_insert_before_first_range():
+    pw = PiecewiseFunc([p.singleton(-50), p.closedopen(13.5, 15)],
+                       [lambda x: 1, lambda x: 2])
+
+    pw.insert_branch(p.openclosed(3.5, 5), lambda x: 3)
+
+    assert [*pw([-50, 3.5, 4, 13.5, 14, 15])] == [1, None, 3, 2, 2, None]
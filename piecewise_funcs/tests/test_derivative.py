@@ -0,0 +1,74 @@
+from pickle import dumps, loads
+
+from ..piecewise_function import PiecewiseFunc
+from ..utils import AffineFunc
+
+import portion as p
+import pytest
+
+def _kinked(x: float) -> float:
+    if x < 0:
+        return -2*x + 1
+    elif 0 <= x < 3:
+        return x/2 + 1
+    elif x == 3:
+        return 7
+    return 5 - x
+
+def test_from_funcdef_keeps_coefficients():
+    pw = PiecewiseFunc.from_funcdef(_kinked)
+
+    assert [(f.slope, f.intercept) for f in pw.funcs if
+            isinstance(f, AffineFunc)] == [(-2, 1), (.5, 1), (0, 7), (-1, 5)]
+
+def _rounding(x: float) -> float:
+    if x < 0:
+        return x/3
+    return (x + 0.1)*3
+
+def test_from_funcdef_evaluates_as_written():
+    pw = PiecewiseFunc.from_funcdef(_rounding)
+    x = [i / 7 - 50 for i in range(700)]
+
+    assert [*pw(x)] == [v/3 if v < 0 else (v + 0.1)*3 for v in x]
+    assert [*loads(dumps(pw))(x)] == [*pw(x)]
+    assert (pw.funcs[0].slope, pw.funcs[0].intercept) == (1/3, 0)
+
+def test_derivative():
+    pw = PiecewiseFunc.from_funcdef(_kinked).derivative()
+
+    assert pw.intervals == PiecewiseFunc.from_funcdef(_kinked).intervals
+    assert [*pw([-1, 0, 1, 3, 4])] == [-2, .5, .5, 0, -1]
+
+def test_derivative_at_infinities():
+    pw = PiecewiseFunc([p.open(-p.inf, 0)], [AffineFunc(2, 1),
+                                             AffineFunc(0, 3)])
+    inf = float('inf')
+
+    assert [*pw([inf, -inf])] == [3, -inf]
+    assert [*pw.derivative()([inf, -inf])] == [0, 2]
+    assert [*PiecewiseFunc.from_funcdef(_kinked).derivative()([inf, -inf])] \
+        == [-1, -2]
+
+def test_subgradient():
+    pw = PiecewiseFunc.from_funcdef(_kinked)
+
+    assert [*pw.subgradient([-1, 0, 3, 4])] == \
+        [(-2, -2), (-2, .5), (.5, -1), (-1, -1)]
+    assert next(pw.subgradient(1)) == (.5, .5)
+
+def test_subgradient_domain_edges():
+    pw = PiecewiseFunc([p.closed(0, 1), p.open(2, 3)],
+                       [AffineFunc(1, 0), AffineFunc(-1, 0)])
+
+    assert [*pw.subgradient([0, 1, 2, 5])] == \
+        [(None, 1), (1, None), (None, -1), (None, None)]
+
+def test_non_affine_branch():
+    pw = PiecewiseFunc([], [lambda x: x*x])
+
+    with pytest.raises(ValueError, match=r"not affine"):
+        pw.derivative()
+
+    with pytest.raises(ValueError, match=r"not affine"):
+        next(pw.subgradient(1))
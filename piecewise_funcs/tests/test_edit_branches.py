@@ -0,0 +1,110 @@
+from ..piecewise_function import PiecewiseFunc
+from ..utils import AffineFunc
+
+import pickle
+import portion as p
+import pytest
+
+def _bands(n):
+    return PiecewiseFunc([p.closedopen(2*i, 2*i + 1) for i in range(n)],
+                         [AffineFunc(0, i) for i in range(n)] + \
+                         [AffineFunc(0, -1)])
+
+def _assert_consistent(pw, x):
+    fresh = PiecewiseFunc(pw.intervals[:-1] if pw.has_otherwise
+                          else pw.intervals, pw.funcs)
+
+    assert fresh.intervals == pw.intervals
+    assert [*pw(x)] == [*fresh(x)]
+
+def test_insert_branch_carves_otherwise():
+    pw = _bands(5)
+    x = [i / 4 for i in range(-4, 48)]
+
+    assert pw.insert_branch(p.closedopen(3, 4) | p.singleton(20),
+                            AffineFunc(1, 0)) == 5
+
+    assert [*pw([3.5, 20, 21, 4])] == [3.5, 20, -1, 2]
+    assert pw.intervals[-1] == ~(p.Interval(*pw.intervals[:-1]))
+    _assert_consistent(pw, x)
+
+def test_insert_branch_without_otherwise():
+    pw = PiecewiseFunc([p.closed(0, 1)], [AffineFunc(1, 0)])
+
+    assert pw.insert_branch(p.open(1, 2), AffineFunc(0, 5)) == 1
+    assert [*pw([1, 1.5, 2])] == [1, 5, None]
+
+def test_insert_overlapping_branch():
+    pw = _bands(5)
+
+    with pytest.raises(ValueError):
+        pw.insert_branch(p.closed(0.5, 1.5), AffineFunc(0, 0))
+
+    with pytest.raises(ValueError):
+        pw.insert_branch(p.closed(20, 21) | p.singleton(8), AffineFunc(0, 0))
+
+    # a failed insertion leaves the function untouched
+    assert len(pw.funcs) == 6
+    assert [*pw([20.5, 8])] == [-1, 4]
+
+def test_remove_branch():
+    pw = _bands(5)
+    x = [i / 4 for i in range(-4, 48)]
+
+    removed = pw.funcs[1]
+
+    assert pw.remove_branch(1) == (p.closedopen(2, 3), removed)
+    assert [*pw([2.5, 4.5, 8.5])] == [-1, 2, 4]
+    _assert_consistent(pw, x)
+
+    with pytest.raises(ValueError):
+        pw.remove_branch(-1)
+
+    plain = PiecewiseFunc([p.closed(0, 1), p.open(1, 2)],
+                          [AffineFunc(0, 1), AffineFunc(0, 2)])
+    plain.remove_branch(0)
+
+    assert [*plain([.5, 1.5])] == [None, 2]
+
+    with pytest.raises(ValueError):
+        plain.remove_branch(0)
+
+def test_replace_branch():
+    pw = _bands(3)
+    assert pw.range_max(0, 5) == 2
+
+    pw.replace_branch(2, AffineFunc(0, 10))
+    pw.replace_branch(-1, AffineFunc(0, -10))
+
+    assert [*pw([4, 3])] == [10, -10]
+    assert pw.range_max(0, 5) == 10
+
+def test_edits_survive_pickling():
+    pw = _bands(4)
+    pw.insert_branch(p.closed(10, 11), AffineFunc(2, 0))
+    pw.remove_branch(0)
+
+    clone = pickle.loads(pickle.dumps(pw))
+
+    assert clone.intervals == pw.intervals
+    assert clone.has_otherwise
+    clone.insert_branch(p.singleton(0), AffineFunc(0, 7))
+    assert [*clone([0, .5, 10])] == [7, -1, 20]
+
+def test_interleaved_edits_on_grid():
+    pw = PiecewiseFunc([p.closedopen(i, i + 1) for i in range(64)],
+                       [AffineFunc(0, i) for i in range(64)], grid_step=1.)
+    x = [i / 4 for i in range(-8, 280)]
+
+    for step in range(20):
+        pw.remove_branch(step % len(pw.funcs))
+        pw.insert_branch(p.closedopen(64 + step, 65 + step),
+                         AffineFunc(1, step))
+        pw.replace_branch(-1, AffineFunc(2, step))
+
+        # enough lookups to rebuild the bucket table in between
+        _assert_consistent(pw, x)
+
+    assert len(pw.funcs) == 64
+    assert [*pw.subgradient(83.5)] == [(2, 2)]
+    assert pw.to_numpy_piecewise([83.5, -1])[0][-1] == [True, False]
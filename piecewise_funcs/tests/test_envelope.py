@@ -0,0 +1,94 @@
+from random import Random
+
+from ..piecewise_function import PiecewiseFunc
+from ..utils import AffineFunc
+
+import portion as p
+import pytest
+
+def _random_func(rng: Random) -> PiecewiseFunc:
+    bounds = sorted(rng.sample(range(-20, 21), 6))
+    intervals, callbacks = [], []
+
+    for lo, hi in zip(bounds[::2], bounds[1::2]):
+        intervals.append(rng.choice([p.closed, p.open, p.closedopen])(lo, hi))
+        callbacks.append(AffineFunc(rng.randint(-3, 3), rng.randint(-9, 9)))
+
+    intervals.append(p.singleton((bounds[1] + bounds[2]) / 2))
+    callbacks.append(AffineFunc(0, rng.randint(-9, 9)))
+
+    return PiecewiseFunc(intervals, callbacks)
+
+def _brute_force(funcs, x, pick):
+    values = [(next(iter(f(x))), pos) for pos, f in enumerate(funcs)]
+    values = [(v, pos) for v, pos in values if v is not None]
+
+    if not values:
+        return None, None
+
+    best = pick(v for v, _ in values)
+    return best, float(next(pos for v, pos in values if v == best))
+
+def test_envelope_of_two_lines():
+    f = PiecewiseFunc([p.open(-p.inf, p.inf)], [AffineFunc(1, 0)])
+    g = PiecewiseFunc([p.open(-p.inf, p.inf)], [AffineFunc(-1, 2)])
+
+    lower, winner = PiecewiseFunc.lower_envelope([f, g])
+
+    assert len(lower.funcs) == 2
+    assert [*lower([-3, 1, 4])] == [-3, 1, -2]
+    assert [*winner([-3, 1, 4])] == [0, 0, 1]
+
+    upper, winner = PiecewiseFunc.upper_envelope([f, g])
+
+    assert [*upper([-3, 1, 4])] == [5, 1, 4]
+    assert [*winner([-3, 1, 4])] == [1, 0, 0]
+
+@pytest.mark.parametrize("seed", range(5))
+def test_envelope_matches_brute_force(seed):
+    rng = Random(seed)
+    funcs = [_random_func(rng) for _ in range(6)]
+    x = [i / 8 for i in range(-200, 201)] + [rng.uniform(-25, 25)
+                                             for _ in range(200)]
+
+    for build, pick in ((PiecewiseFunc.lower_envelope, min),
+                        (PiecewiseFunc.upper_envelope, max)):
+        envelope, winner = build(funcs)
+
+        for v, value, pos in zip(x, envelope(x), winner(x)):
+            expected, expected_pos = _brute_force(funcs, v, pick)
+
+            assert value == pytest.approx(expected)
+
+            # crossings computed in floats may land off by a rounding error
+            if pos != expected_pos:
+                assert next(iter(funcs[int(pos)](v))) == pytest.approx(expected)
+
+def test_envelope_at_infinities():
+    f = PiecewiseFunc([p.open(-p.inf, 0)], [AffineFunc(2, 1), AffineFunc(0, 3)])
+    g = PiecewiseFunc([p.open(-p.inf, p.inf)], [AffineFunc(0, 5)])
+    inf = float('inf')
+
+    envelope, winner = PiecewiseFunc.lower_envelope([f, g])
+
+    assert [*envelope([inf, -inf])] == [3, -inf]
+    assert [*winner([inf, -inf])] == [0, 0]
+
+def test_envelope_merges_identical_inputs():
+    f = PiecewiseFunc.approximate(lambda x: x * x, p.closed(0, 4), .1)[0]
+    envelope, winner = PiecewiseFunc.lower_envelope([f, f, f])
+
+    assert len(envelope.funcs) == len(f.funcs)
+    assert len(winner.funcs) == 1
+    assert winner.intervals == [p.closed(0, 4)]
+
+def test_envelope_illegal_inputs():
+    with pytest.raises(ValueError):
+        PiecewiseFunc.lower_envelope([])
+
+    with pytest.raises(ValueError):
+        PiecewiseFunc.lower_envelope([PiecewiseFunc([p.closed(0, 1)],
+                                                    [lambda x: x])])
+
+    with pytest.raises(TypeError):
+        PiecewiseFunc.upper_envelope([lambda x: x])
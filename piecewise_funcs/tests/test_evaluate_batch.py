@@ -0,0 +1,82 @@
+from array import array
+
+from ..piecewise_function import PiecewiseFunc
+from ..utils import vectorized
+
+import portion as p
+import pytest
+
+def _func(x: float) -> float:
+    if -5 < x < 0 or 1 <= x < 2:
+        return -x
+    elif x == -6:
+        return 7 / 8
+    return 2 * x
+
+def _model():
+    calls = []
+
+    @vectorized
+    def model(batch):
+        calls.append(list(batch))
+        return [2 * v for v in batch]
+
+    return model, calls
+
+def test_evaluate_batch_groups_vectorized_calls():
+    model, calls = _model()
+    plain_calls = []
+
+    def plain(x):
+        plain_calls.append(x)
+        return -x
+
+    pw = PiecewiseFunc([p.closedopen(0, 10), p.closed(20, 30)], [model, plain])
+    x = [5, 25, 1, 40, 9.5, 20, 0]
+
+    assert pw.evaluate_batch(x) == [10, -25, 2, None, 19, -20, 0]
+    assert calls == [[5, 1, 9.5, 0]]
+    assert plain_calls == [25, 20]
+
+def test_evaluate_batch_matches_call():
+    pw = PiecewiseFunc.from_funcdef(_func)
+    x = [-6, -1, 0, 1.5, 3, 1]
+
+    assert pw.evaluate_batch(x) == [*pw(x)]
+
+def test_evaluate_batch_otherwise_and_scalar():
+    model, calls = _model()
+    pw = PiecewiseFunc([p.closed(0, 1)], [lambda x: 7, model])
+
+    assert pw.evaluate_batch([-1, .5, 3]) == [-2, 7, 6]
+    assert calls == [[-1, 3]]
+    assert pw.evaluate_batch(4) == [8]
+    assert pw.evaluate_batch([]) == []
+
+def test_evaluate_batch_illegal_callback():
+    pw = PiecewiseFunc([p.closed(0, 1)], [vectorized(lambda batch: [1])])
+
+    with pytest.raises(ValueError):
+        pw.evaluate_batch([0, .5])
+
+    with pytest.raises(TypeError):
+        pw.evaluate_batch(["a"])
+
+def test_vectorized_callbacks_on_scalar_paths():
+    model, calls = _model()
+    pw = PiecewiseFunc([p.closed(0, 1)], [lambda x: 7, model])
+    out = array('d', [0.] * 3)
+
+    assert [*pw(-1)] == [-2]
+    assert [*pw([-1, .5, 3])] == [-2, 7, 6]
+    assert pw.min([-1, .5, 3]) == (0, -2)
+    assert pw.max(range(-2, 4)) == (2, 7)
+    assert pw.evaluate_into([-1, .5, 3], out) == 3
+    assert list(out) == [-2, 7, 6]
+    assert [-1] in calls
+
+    model, _ = _model()
+    pw.replace_branch(0, model)
+    pw.insert_branch(p.closed(10, 11), model)
+
+    assert [*pw([.5, 10, 3])] == [1, 20, 6]
@@ -0,0 +1,54 @@
+from array import array
+from math import isnan
+
+from ..piecewise_function import PiecewiseFunc
+
+import pytest
+
+def _func(x: float) -> float:
+    if -5 < x < 0 or 1 <= x < 2:
+        return -x
+    elif x == -6:
+        return 7 / 8
+
+def test_evaluate_into_array():
+    pw = PiecewiseFunc.from_funcdef(_func)
+    x = [-6, -1, 0, 1.5, 3]
+    out, mask = array('d', [0.] * 5), bytearray(5)
+
+    assert pw.evaluate_into(x, out, mask) == 3
+    assert list(mask) == [1, 1, 0, 1, 0]
+    assert [v for v, m in zip(out, mask) if m] == [.875, 1, -1.5]
+    assert all(isnan(v) for v, m in zip(out, mask) if not m)
+
+def test_evaluate_into_byte_buffer_with_fill():
+    pw = PiecewiseFunc.from_funcdef(_func)
+    raw = bytearray(8 * 3)
+
+    assert pw.evaluate_into(range(-1, 2), memoryview(raw), fill=-99.) == 2
+    assert array('d', bytes(raw)).tolist() == [1, -99, -1]
+
+def test_evaluate_into_scalar():
+    pw = PiecewiseFunc.from_funcdef(_func)
+    out = array('d', [0.])
+
+    assert pw.evaluate_into(-2, out) == 1
+    assert out[0] == 2
+
+def test_evaluate_into_illegal_buffers():
+    pw = PiecewiseFunc.from_funcdef(_func)
+
+    with pytest.raises(ValueError):
+        pw.evaluate_into([1, 2, 3], array('d', [0.] * 2))
+
+    with pytest.raises(ValueError):
+        pw.evaluate_into(iter([1, 2, 3]), array('d', [0.] * 2))
+
+    with pytest.raises(TypeError):
+        pw.evaluate_into([1], bytes(8))
+
+    with pytest.raises(TypeError):
+        pw.evaluate_into([1], array('f', [0.]))
+
+    with pytest.raises(TypeError):
+        pw.evaluate_into([1], [0.])
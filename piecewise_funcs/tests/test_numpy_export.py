@@ -0,0 +1,80 @@
+from math import isnan
+
+from ..piecewise_function import PiecewiseFunc
+from ..utils import AffineFunc
+
+import portion as p
+import pytest
+
+def _hat(x: float) -> float:
+    if x < 0:
+        return 0
+    elif 0 <= x < 1:
+        return x
+    elif 1 <= x < 2:
+        return 2 - x
+    return 0
+
+def _interp(x, xp, fp):
+    # numpy.interp in pure python, for the tests to run without numpy
+    if x <= xp[0]:
+        return fp[0]
+    if x >= xp[-1]:
+        return fp[-1]
+
+    i = next(i for i in range(1, len(xp)) if x <= xp[i])
+    t = (x - xp[i - 1]) / (xp[i] - xp[i - 1])
+
+    return fp[i - 1] + t * (fp[i] - fp[i - 1])
+
+def test_interp_table():
+    pw = PiecewiseFunc.from_funcdef(_hat)
+    xp, fp = pw.to_interp_table()
+
+    assert (xp, fp) == ([0, 1, 2], [0, 1, 0])
+
+    x = [i / 8 for i in range(-16, 40)]
+    assert [_interp(v, xp, fp) for v in x] == [*pw(x)]
+
+def test_interp_table_bounded_domain():
+    pw = PiecewiseFunc([p.closed(0, 1), p.openclosed(1, 3)],
+                       [AffineFunc(2, 0), AffineFunc(-1, 3)])
+
+    assert pw.to_interp_table() == ([0, 1, 3], [0, 2, 0])
+
+def test_interp_table_not_exportable():
+    with pytest.raises(ValueError, match=r"continuous"):
+        PiecewiseFunc([p.closed(0, 1), p.closed(2, 3)],
+                      [AffineFunc(1, 0), AffineFunc(1, 0)]).to_interp_table()
+
+    with pytest.raises(ValueError, match=r"unbounded"):
+        PiecewiseFunc([], [AffineFunc(1, 0)]).to_interp_table()
+
+    with pytest.raises(ValueError, match=r"not affine"):
+        PiecewiseFunc([], [abs]).to_interp_table()
+
+    assert PiecewiseFunc([], [AffineFunc(0, 4)]).to_interp_table() == \
+        ([0], [4])
+
+def test_numpy_piecewise_args():
+    pw = PiecewiseFunc([p.closed(0, 1), p.singleton(3)],
+                       [AffineFunc(2, 1), AffineFunc(0, 7), abs])
+    condlist, funclist = pw.to_numpy_piecewise([.5, 3, -4, 2])
+
+    assert condlist == [[True, False, False, False],
+                        [False, True, False, False],
+                        [False, False, True, True]]
+    assert funclist[1:3] == [7, abs] and isnan(funclist[-1])
+
+def test_numpy_roundtrip():
+    np = pytest.importorskip("numpy")
+
+    pw = PiecewiseFunc.from_funcdef(_hat)
+    x = np.linspace(-2, 4, 61)
+
+    assert np.allclose(np.interp(x, *pw.to_interp_table()), [*pw(x)])
+    assert np.allclose(np.piecewise(x, *pw.to_numpy_piecewise(x)), [*pw(x)])
+
+    for v in (-1., .5, 2.5, np.float64(.25)):
+        assert np.piecewise(v, *pw.to_numpy_piecewise(v)) == \
+            pytest.approx(next(iter(pw(v))))
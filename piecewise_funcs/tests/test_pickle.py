@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from ..piecewise_function import PiecewiseFunc
+from ..utils import AffineFunc
+
+import pickle
+import portion as p
+import pytest
+
+def _func(x: float) -> float:
+    if x < 0:
+        return -2*x + 1
+    elif 0 <= x < 3 or 5 < x <= 6:
+        return x/2 + 1
+    elif x == 4:
+        return 7
+
+def _evaluate(pw, x):
+    return [*pw(x)]
+
+def test_roundtrip():
+    pw = PiecewiseFunc.from_funcdef(_func)
+    clone = pickle.loads(pickle.dumps(pw))
+
+    x = [-1, 0, 2, 4, 4.5, 5.5, 7]
+
+    assert clone.intervals == pw.intervals
+    assert [*clone(x)] == [*pw(x)]
+    assert clone.branch_table() == pw.branch_table()
+
+def test_otherwise_branch_roundtrip():
+    pw = PiecewiseFunc([p.closed(0, 1)], [AffineFunc(1, 0), AffineFunc(0, -1)])
+    clone = pickle.loads(pickle.dumps(pw))
+
+    assert clone.intervals == pw.intervals
+    assert [*clone([-1, .5, 2])] == [-1, .5, -1]
+
+def test_size_proportional_to_branches():
+    def _sized(n):
+        pw = PiecewiseFunc([p.closedopen(i, i + 1) for i in range(n)],
+                           [AffineFunc(i, -i) for i in range(n)])
+        return len(pickle.dumps(pw))
+
+    assert 5 < _sized(1000) / _sized(100) < 15
+
+def test_non_affine_callables_are_pickled_as_is():
+    pw = PiecewiseFunc([], [abs])
+    assert [*pickle.loads(pickle.dumps(pw))([-2])] == [2]
+
+    with pytest.raises(Exception):
+        pickle.dumps(PiecewiseFunc([], [lambda x: x]))
+
+def test_process_pool():
+    pw = PiecewiseFunc.from_funcdef(_func)
+
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        assert pool.submit(_evaluate, pw, [-1, 2]).result() == [3, 2]
@@ -0,0 +1,58 @@
+from math import inf
+from random import Random
+
+from ..piecewise_function import PiecewiseFunc
+from ..utils import AffineFunc
+
+import portion as p
+import pytest
+
+def _func(x: float) -> float:
+    if x < 0:
+        return -2*x + 1
+    elif 0 <= x < 3:
+        return x/2 + 1
+    elif x == 4:
+        return 7
+    elif 5 < x <= 10:
+        return 5 - x
+
+def test_range_min_max():
+    pw = PiecewiseFunc.from_funcdef(_func)
+
+    assert (pw.range_min(-1, 2), pw.range_max(-1, 2)) == (1, 3)
+    assert (pw.range_min(1, 4), pw.range_max(1, 4)) == (1.5, 7)
+    assert (pw.range_min(3.5, 20), pw.range_max(3.5, 20)) == (-5, 7)
+    assert pw.range_min(-p.inf, 0) == 1
+    assert pw.range_max(-p.inf, 0) == inf
+
+def test_range_outside_domain():
+    pw = PiecewiseFunc.from_funcdef(_func)
+
+    assert pw.range_min(3, 3.5) is None
+    assert pw.range_max(11, 12) is None
+    assert pw.range_min(2, 1) is None
+
+def test_range_extrema_matches_sampling():
+    rng = Random(7)
+    n = 200
+    pw = PiecewiseFunc(
+        [p.closedopen(i, i + 1) for i in range(n)],
+        [AffineFunc(rng.uniform(-1, 1), rng.uniform(-5, 5)) for i in range(n)],
+    )
+
+    windows = [sorted((rng.randrange(0, 4*n), rng.randrange(0, 4*n)))
+               for _ in range(50)]
+    windows = [(a / 4, b / 4) for a, b in windows]
+
+    for (a, b), (lo, hi) in zip(windows, pw.range_extrema(windows)):
+        grid = [a + (b - a) * i / 4000 for i in range(4001)]
+        values = [y for y in pw(grid) if y is not None]
+
+        assert lo <= min(values) + 1e-9 and hi >= max(values) - 1e-9
+        assert lo >= min(values) - (b - a) / 4000 - 1e-9
+        assert hi <= max(values) + (b - a) / 4000 + 1e-9
+
+def test_range_non_affine():
+    with pytest.raises(ValueError, match=r"not affine"):
+        PiecewiseFunc([], [abs]).range_min(0, 1)
@@ -0,0 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from ..piecewise_function import PiecewiseFunc
+from ..result_cache import ResultCache, WINDOW
+from ..utils import AffineFunc
+
+import pickle
+import portion as p
+import pytest
+
+class _Counted:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, x: float) -> float:
+        self.calls += 1
+        return 2*x
+
+def test_repeated_inputs_hit_the_cache():
+    clbk = _Counted()
+    pw = PiecewiseFunc([p.closed(0, 10)], [clbk], cache_size=4)
+
+    assert [*pw([5, 5, 1, 5., 20, 20])] == [10, 10, 2, 10, None, None]
+    assert clbk.calls == 2
+
+    info = pw.cache_info
+    assert (info.hits, info.misses, info.currsize) == (3, 3, 3)
+
+def test_lru_eviction():
+    clbk = _Counted()
+    pw = PiecewiseFunc([], [clbk], cache_size=2)
+
+    [*pw([1, 2, 1, 3, 1, 2])]
+
+    # 2 is evicted by 3, while 1 is kept alive
+    assert clbk.calls == 4
+    assert pw.cache_info.currsize == 2
+
+def test_cache_disabled_by_default():
+    pw = PiecewiseFunc([], [AffineFunc(1, 0)])
+
+    assert pw.cache_size == 0 and pw.cache_info is None
+
+    pw.cache_size = 8
+    [*pw([1, 1])]
+    assert pw.cache_info.hits == 1
+
+def test_bypass_on_low_hit_rate():
+    clbk = _Counted()
+    pw = PiecewiseFunc([], [clbk], cache_size=16)
+
+    [*pw(range(WINDOW))]
+    assert pw.cache_info.bypassed and pw.cache_info.currsize == 0
+
+    [*pw([1, 1])]
+    assert clbk.calls == WINDOW + 2
+
+def test_edits_clear_the_cache():
+    pw = PiecewiseFunc([p.closed(0, 1)], [AffineFunc(1, 0)], cache_size=8)
+
+    assert [*pw([1])] == [1]
+    pw.replace_branch(0, AffineFunc(0, 7))
+    assert [*pw([1])] == [7]
+
+def test_cache_size_survives_pickling():
+    pw = PiecewiseFunc([], [AffineFunc(1, 0)], cache_size=8)
+
+    assert pickle.loads(pickle.dumps(pw)).cache_size == 8
+
+def test_thread_safety():
+    pw = PiecewiseFunc([p.closed(0, 100)], [AffineFunc(3, 1)], cache_size=32)
+    x = [i % 20 for i in range(2000)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = [*pool.map(lambda _: [*pw(x)], range(8))]
+
+    assert all(r == [3*v + 1 for v in x] for r in results)
+
+    info = pw.cache_info
+    assert info.hits + info.misses == 8 * len(x) and info.currsize <= 32
+
+def test_illegal_size():
+    with pytest.raises(ValueError):
+        ResultCache(-1)
@@ -0,0 +1,83 @@
+from pickle import dumps, loads
+
+from ..piecewise_function import PiecewiseFunc
+from ..utils import AffineFunc
+
+import gc
+import portion as p
+
+def _func(x: float) -> float:
+    if 0 <= x < 1:
+        return 2 * x
+    elif x == 5:
+        return 1
+    return -1
+
+def test_equal_definitions():
+    f, g = PiecewiseFunc.from_funcdef(_func), PiecewiseFunc.from_funcdef(_func)
+
+    assert f is not g and f.funcs[0] is not g.funcs[0]
+    assert f == g and hash(f) == hash(g)
+    assert len({f, g}) == 1
+    assert loads(dumps(f)) == f
+
+def test_equal_up_to_branch_order_and_split():
+    f = PiecewiseFunc([p.closedopen(0, 1), p.closed(1, 2), p.singleton(5)],
+                      [AffineFunc(1, 0), AffineFunc(1., 0.), AffineFunc(0, 3)])
+    g = PiecewiseFunc([p.singleton(5), p.closed(0, 2)],
+                      [AffineFunc(0, 3), AffineFunc(1, 0)])
+
+    assert f == g and hash(f) == hash(g)
+
+def test_not_equal():
+    f = PiecewiseFunc.from_funcdef(_func)
+    g = PiecewiseFunc([p.closedopen(0, 1)], [AffineFunc(2, 0)])
+    h = PiecewiseFunc([p.closed(0, 1)], [AffineFunc(2, 0)])
+
+    assert f != g and g != h and f != "f"
+
+    # opaque callbacks are compared by identity
+    assert PiecewiseFunc.from_funcdef(_func) != \
+        PiecewiseFunc([p.closedopen(0, 1), p.singleton(5)],
+                      [AffineFunc(2, 0), AffineFunc(0, 1), AffineFunc(0, -1)])
+
+    clbk = lambda x: x
+    assert PiecewiseFunc([p.closed(0, 1)], [clbk]) == \
+        PiecewiseFunc([p.closed(0, 1)], [clbk])
+    assert PiecewiseFunc([p.closed(0, 1)], [clbk]) != \
+        PiecewiseFunc([p.closed(0, 1)], [lambda x: x])
+
+def test_edits_change_equality():
+    f, g = PiecewiseFunc.from_funcdef(_func), PiecewiseFunc.from_funcdef(_func)
+    assert f == g
+
+    func = f.funcs[0]
+
+    f.replace_branch(0, AffineFunc(3, 0))
+    assert f != g
+
+    f.replace_branch(0, func)
+    assert f == g and hash(f) == hash(g)
+
+    g.insert_branch(p.closed(10, 11), AffineFunc(0, 0))
+    assert f != g
+
+def test_intern():
+    f, g = PiecewiseFunc.from_funcdef(_func), PiecewiseFunc.from_funcdef(_func)
+
+    assert PiecewiseFunc.intern(f) is f
+    assert PiecewiseFunc.intern(g) is f
+
+    # an edited canonical instance is replaced
+    f.replace_branch(0, AffineFunc(3, 0))
+    assert PiecewiseFunc.intern(g) is g
+
+    h = PiecewiseFunc([p.closed(7, 8)], [AffineFunc(0, 1)])
+    assert PiecewiseFunc.intern(h) is h
+
+    # the pool does not keep the canonical instances alive
+    del h
+    gc.collect()
+
+    h = PiecewiseFunc([p.closed(7, 8)], [AffineFunc(0, 1)])
+    assert PiecewiseFunc.intern(h) is h
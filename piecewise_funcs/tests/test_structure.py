@@ -0,0 +1,84 @@
+from math import inf
+
+from ..piecewise_function import PiecewiseFunc
+from ..utils import AffineFunc
+
+import portion as p
+import pytest
+
+def _convex(x: float) -> float:
+    if x < 0:
+        return -2*x + 1
+    elif 0 <= x < 3:
+        return x/2 + 1
+    return 2*x - 3.5
+
+def _staircase(x: float) -> float:
+    if x < 0:
+        return 0
+    elif 0 <= x < 1:
+        return x
+    elif 1 <= x < 2:
+        return 3
+    return 5 + x
+
+def test_convex_function():
+    pw = PiecewiseFunc.from_funcdef(_convex)
+
+    assert pw.is_continuous and pw.is_convex
+    assert not pw.is_monotone and pw.monotonicity is None
+    assert pw.lipschitz_bound == 2
+
+def test_monotone_jumps():
+    pw = PiecewiseFunc.from_funcdef(_staircase)
+
+    assert pw.monotonicity == 1 and pw.is_monotone
+    assert not pw.is_continuous and not pw.is_convex
+    assert pw.lipschitz_bound == inf
+
+def test_domain_with_holes():
+    pw = PiecewiseFunc([p.closed(0, 1), p.closed(3, 4), p.singleton(5)],
+                       [AffineFunc(-1, 0), AffineFunc(0, -5), AffineFunc(0, -5)])
+
+    assert pw.is_continuous and pw.monotonicity == -1
+    assert not pw.is_convex
+    assert pw.lipschitz_bound == 2
+
+    constant = PiecewiseFunc([p.open(0, 1), p.open(1, 2)],
+                             [AffineFunc(0, 1), AffineFunc(0, 1)])
+
+    assert constant.monotonicity == 0 and constant.lipschitz_bound == 0
+
+def test_properties_follow_edits():
+    pw = PiecewiseFunc.from_funcdef(_staircase)
+    assert pw.monotonicity == 1
+
+    pw.replace_branch(2, AffineFunc(0, -1))
+    assert pw.monotonicity is None
+
+def test_non_affine_properties():
+    with pytest.raises(ValueError):
+        PiecewiseFunc([], [abs]).is_continuous
+
+def test_monotone_minmax_shortcut():
+    pw = PiecewiseFunc.from_funcdef(_staircase)
+    x = [i / 8 for i in range(-16, 40)]
+
+    for seq in (x, x[::-1]):
+        expected_min = min(enumerate(pw(seq)), key=lambda e: e[1])
+        expected_max = max(enumerate(pw(seq)), key=lambda e: e[1])
+
+        assert pw.min(seq, assume_sorted=True) == expected_min
+        assert pw.max(seq, assume_sorted=True) == expected_max
+
+    assert pw.min(range(-3, 10)) == (0, 0)
+    assert pw.max(range(-3, 10)) == (12, 14)
+    assert pw.max(range(10, -3, -1)) == (0, 15)
+
+def test_monotone_minmax_falls_back():
+    pw = PiecewiseFunc([p.closed(0, 1), p.closed(3, 4)],
+                       [AffineFunc(1, 0), AffineFunc(1, 0)])
+
+    # the domain has a hole, the shortcut does not apply
+    assert pw.max(range(0, 6), assume_sorted=True) == (4, 4)
+    assert pw.min(range(-2, 6)) == (2, 0)
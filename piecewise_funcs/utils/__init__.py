@@ -1,6 +1,12 @@
 from typing import Iterable, Union
 
-from .utils import boolop_to_interval, node_to_func
+from .utils import (
+    AffineFunc,
+    boolop_to_interval,
+    node_to_coeffs,
+    node_to_func,
+    vectorized,
+)
 
 RealField = Union[float, Iterable[float]]
 
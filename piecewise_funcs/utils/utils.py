@@ -1,7 +1,7 @@
 from functools import reduce
 from itertools import chain
 from operator import add, and_, mul, or_, sub, truediv
-from typing import Any, Callable, Union
+from typing import Any, Callable, Optional, Tuple, Union
 
 from portion.interval import Interval
 
@@ -17,6 +17,13 @@ op_map = {
     ast.Sub: sub,
 }
 
+op_symbols = {
+    ast.Mult: "*",
+    ast.Add: "+",
+    ast.Div: "/",
+    ast.Sub: "-",
+}
+
 CMP_ERROR = Exception("Compare expression of x, must be " \
                       " of the form:\n" \
                       "\tx <cmp_op> <constant> or \n" \
@@ -158,4 +165,129 @@ def node_to_func(root: Any) -> Callable[[float], float]:
 
     assert isinstance(root, ast.Return)
 
+    coeffs = node_to_coeffs(root)
+
+    # affine expressions keep their coefficients around, while still being
+    # evaluated as written
+    if coeffs is not None:
+        assert root.value is not None
+
+        return AffineFunc(*coeffs, expr=_node_to_source(root.value))
     return _func
+
+
+class AffineFunc:
+    """
+        Callable branch of the form x -> slope*x + intercept.
+
+        Unlike the closures produced by node_to_func, it keeps its
+        coefficients around, so that they can be inspected by the
+        analytic operations of PiecewiseFunc.
+
+        Given the source expr of the expression of x it was derived from,
+        it evaluates that expression as written instead, so that rounding
+        matches the original, e.g. for x/3 rather than 1/3*x. The source
+        is kept, rather than its AST, so that it pickles compactly, and it
+        is compiled once into a lambda, checked to hold only the first order
+        expressions node_to_coeffs accepts.
+    """
+
+    __slots__ = ("slope", "intercept", "expr", "__eval")
+
+    def __init__(self, slope: float, intercept: float,
+                 expr: Optional[str] = None):
+        self.slope = slope
+        self.intercept = intercept
+        self.expr = expr
+        self.__eval = None if expr is None else _compile_expr(expr)
+
+    def __call__(self, x: float) -> float:
+        if self.__eval is not None:
+            return self.__eval(x)
+        elif not self.slope:  # rather than nan at infinities
+            return self.intercept
+        return self.slope * x + self.intercept
+
+    def __repr__(self) -> str:
+        if self.expr is not None:
+            return f"AffineFunc({self.slope!r}, {self.intercept!r}, " \
+                   f"expr={self.expr!r})"
+        return f"AffineFunc({self.slope!r}, {self.intercept!r})"
+
+
+def _compile_expr(expr: str) -> Callable[[float], float]:
+    tree = ast.parse(f"lambda x: {expr}", mode="eval")
+
+    assert isinstance(tree.body, ast.Lambda)
+
+    if node_to_coeffs(ast.Return(value=tree.body.body)) is None:
+        raise EXPR_ERROR
+
+    return eval(compile(tree, "<expr>", "eval"), {})
+
+
+def _node_to_source(node: ast.expr) -> str:
+    # fully parenthesized, so that it parses back to the same tree, the
+    # nodes are the ones node_to_coeffs accepts
+    if isinstance(node, ast.Constant):
+        return repr(node.value)
+    elif isinstance(node, ast.UnaryOp):
+        return f"(-{_node_to_source(node.operand)})"
+    elif isinstance(node, ast.BinOp):
+        return f"({_node_to_source(node.left)} " \
+               f"{op_symbols[type(node.op)]} {_node_to_source(node.right)})"
+    return "x"
+
+
+def vectorized(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+        Marks a branch callback as vectorized, i.e. accepting a whole list
+        of floats and returning a sequence of as many results, so that
+        PiecewiseFunc.evaluate_batch calls it once per branch rather than
+        once per value. The other evaluation methods call it on a list of a
+        single value, so it need not accept scalars.
+    """
+    func.vectorized = True  # type: ignore[attr-defined]
+
+    return func
+
+
+def node_to_coeffs(root: ast.Return) -> Optional[Tuple[float, float]]:
+    def _recur(node):
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or \
+                    not isinstance(node.value, (int, float)):
+                return None
+            return 0, node.value
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, ast.USub):
+                return None
+            elif isinstance(node.operand, ast.Name):
+                return -1, 0
+            elif isinstance(node.operand, ast.Constant):
+                coeffs = _recur(node.operand)
+                return coeffs and (0, -coeffs[1])
+            return None
+        elif isinstance(node, ast.Name):
+            return 1, 0
+        elif isinstance(node, ast.BinOp):
+            left, right = _recur(node.left), _recur(node.right)
+
+            if left is None or right is None:
+                return None
+            elif isinstance(node.op, (ast.Add, ast.Sub)):
+                op = op_map[type(node.op)]
+                return op(left[0], right[0]), op(left[1], right[1])
+            elif isinstance(node.op, ast.Mult):
+                if left[0] and right[0]:  # second order
+                    return None
+                elif left[0]:
+                    return left[0] * right[1], left[1] * right[1]
+                return right[0] * left[1], right[1] * left[1]
+            elif isinstance(node.op, ast.Div):
+                if right[0] or not right[1]:
+                    return None
+                return left[0] / right[1], left[1] / right[1]
+        return None
+
+    return _recur(root.value)